@@ -1,159 +1,452 @@
-import aiohttp
 import asyncio
+import time
+from collections import deque
 from player import Player
+from card import REGISTRY
+from decision_cache import DecisionCache, DecisionLog, decision_key, model_version
+from endgame import ENDGAME_THRESHOLD, EndgameSolver
+from heuristic import rank_moves
+from llm_client import DECISION, INTRO, NARRATIVE, StaleRequest, get_client
+from prompt import card_code, count_tokens, encode_prompt, legend
+from types import SimpleNamespace
+from zobrist import HAND_KEYS
 import json
 import random
+import re
+
+MODEL = "granite3-dense"
+KEEP_ALIVE = "30m"  # Keep the model loaded between turns
+
+
+def partial_field(text, field):
+    """Value of a string field in JSON that may still be arriving ("" until it starts)"""
+    match = re.search(r'"%s"\s*:\s*"' % re.escape(field), text)
+    if not match:
+        return ""
+    value = text[match.end():]
+    end = re.search(r'(?<!\\)(?:\\\\)*"', value)
+    if end:
+        value = value[:end.end() - 1]
+    # Drop an escape sequence that is cut off at the end
+    for cut in range(min(6, len(value)) + 1):
+        try:
+            return json.loads('"' + value[:len(value) - cut] + '"')
+        except ValueError:
+            continue
+    return ""
+
+def ai_game_state(engine):
+    """What decide_move gets to see, for the AI of `engine`"""
+    return {
+        'player_health': engine.player.health,
+        'player_defense': engine.player.defense,
+        'ai_health': engine.ai_player.health,
+        'ai_resources': engine.ai_player.resources,
+        'ai_hand': [card.to_dict() for card in engine.ai_player.hand],
+        'deck': engine.deck,  # needed for draw_cards
+        'engine': engine  # full state for the search AI
+    }
+
+
+def move_schema(cards):
+    """JSON schema for the answer: card_name can only be one of `cards` or skip_turn"""
+    names = sorted({card.name for card in cards if card.effect != "skip"})
+    return {
+        "type": "object",
+        "properties": {"card_name": {"type": "string", "enum": names + ["skip_turn"]}},
+        "required": ["card_name"],
+    }
+
 
 class AIPlayer(Player):
-    def __init__(self, name, server_url):
+    def __init__(self, name, server_url, tiebreak_margin=3.0, llm_tiebreak=True, decisions=None,
+                 max_budget=8.0, min_budget=1.0, chat=False, max_history=40, max_prompt_tokens=120,
+                 decision_log=None, policy=None, policy_confidence=0.0):
         super().__init__(name)
         self.server_url = server_url
-        self.session = None
-
-    async def get_session(self):
-        if self.session is None:
-            self.session = aiohttp.ClientSession()
-        return self.session
+        self.client = get_client(server_url)  # Shared by every player talking to this server
+        self.endgame_threshold = ENDGAME_THRESHOLD
+        # Rules pick the card; the model is only asked when the best scores are this close
+        self.tiebreak_margin = tiebreak_margin
+        self.llm_tiebreak = llm_tiebreak
+        # Model answers for situations seen before, also across games
+        self.decisions = decisions if decisions is not None else DecisionCache()
+        self.versions = {}  # Model name -> model_version, cache keys are per model
+        # Every validated model decision is logged as training data for policy.py
+        self.decision_log = decision_log if decision_log is not None else DecisionLog()
+        # A distilled policy (policy.Policy) decides instead of the model when it is this sure
+        self.policy = policy
+        self.policy_confidence = policy_confidence
+        # Time allowed for a model decision: 1.5x the recent p95, never more than max_budget
+        self.max_budget = max_budget
+        self.min_budget = min_budget
+        self.latencies = deque(maxlen=50)  # Shared with engine clones, like the stats below
+        self.decision_stats = {'model': 0, 'policy': 0, 'fallbacks': 0, 'fallback_seconds': 0.0,
+                               'prompt_tokens': 0, 'prompt_eval_tokens': 0}
+        self.max_prompt_tokens = max_prompt_tokens
+        # Chat mode: one /api/chat conversation per match, each turn only says what changed.
+        # Tuples, so engine clones (prefetch) can't add to the real conversation.
+        self.chat = chat
+        self.max_history = max_history
+        self.chat_history = ()
+        self.held = None  # Decisions of a speculative copy, see speculate()
+        self.chat_seen = None  # State as of the last message
+        self.chat_legend = False  # Whether the first message listed every card
 
     async def decide_move(self, game_state, max_retries=3):
+        started = time.perf_counter()
+        attempt = {'retries': 0, 'error': None}  # Filled in by ask_model
+        card, source = await self.choose_move(game_state, max_retries, attempt)
+        if self.held is not None:
+            self.held.append((card, source, time.perf_counter() - started, attempt))
+        else:
+            self.report(card, source, time.perf_counter() - started, attempt)
+        return card
+
+    def report(self, card, source, seconds, attempt):
+        """Count a decision that is being played: stats, latencies, the log line and metrics"""
+        kind = source.split(",")[0]
+        if kind == "model":
+            self.latencies.append(attempt['model_seconds'])
+            self.decision_stats['model'] += 1
+        elif kind == "policy":
+            self.decision_stats['policy'] += 1
+        elif kind == "fallback":
+            self.decision_stats['fallbacks'] += 1
+            self.decision_stats['fallback_seconds'] += attempt['model_seconds']
+            source += (f": {attempt['error'] or 'no valid answer'}, {self.decision_stats['fallbacks']} so far, "
+                       f"{self.decision_stats['fallback_seconds']:.1f}s spent waiting")
+        print(f"AI playing {card.name} ({source})")
+        self.client.metrics.decision(kind, seconds, self.client.turn, attempt['retries'], attempt['error'])
+
+    def speculate(self):
+        """Make this engine copy hold back its decisions' stats until `adopt` uses one (see prefetch.py)"""
+        self.held = []
+        self.decision_stats = dict.fromkeys(self.decision_stats, 0)
+        self.latencies = deque(self.latencies, maxlen=self.latencies.maxlen)  # Read for the budget only
+
+    async def choose_move(self, game_state, max_retries=3, attempt=None):
+        """(card, where it came from)"""
         if not self.hand:
             self.draw_cards(game_state['deck'], num=3)
-        
+
+        # Few cards left: solve it exactly instead of asking the model
+        engine = game_state.get('engine')
+        if engine is not None and engine.to_move is self and len(engine.deck) <= self.endgame_threshold:
+            card, value = EndgameSolver().best_move(engine)
+            return card, f"endgame, {value:.2f}"
+
+        if engine is not None:
+            opponent = engine.opponent_of(self)
+        else:
+            opponent = SimpleNamespace(health=game_state['player_health'], defense=game_state.get('player_defense', 0),
+                                       skip_next_turn=False)
+        ranked = rank_moves(self.hand, self, opponent, len(game_state['deck']))
+        best_score, best = ranked[0]
+        candidates = [card for score, card in ranked if best_score - score <= self.tiebreak_margin]
+        if len(candidates) == 1 or not self.llm_tiebreak:
+            return best, "rules"
+
+        situation = (candidates, self.resources, self.health, opponent.health, len(game_state['deck']))
+        # Answers of the model the request would most likely go to (a backend can pin its own)
+        key = decision_key(*situation, self.version(self.client.model_for(DECISION, MODEL)))
+        card_name = self.decisions.get(key)
+        card = REGISTRY.by_name(card_name) if card_name else None
+        if card is not None and (card in candidates or card is self.skip_card):
+            return card, "cached"
+
+        if self.policy is not None:
+            card, confidence = self.policy.choose(game_state, candidates)
+            if confidence >= self.policy_confidence:
+                return card, f"policy, {confidence:.2f}"
+
+        # Close call: let the model choose between the top cards only, in time
+        attempt = attempt if attempt is not None else {}
+        budget = self.decision_budget()
+        started = time.perf_counter()
+        card = await self.ask_model(game_state, candidates, situation, max_retries, attempt,
+                                    time.monotonic() + budget)
+        attempt['model_seconds'] = time.perf_counter() - started
+        if card is not None:
+            return card, "model"
+        return best, "fallback"
+
+    def version(self, model):
+        version = self.versions.get(model)
+        if version is None:
+            version = self.versions[model] = model_version(model)
+        return version
+
+    def decision_budget(self):
+        if len(self.latencies) < 5:
+            return self.max_budget
+        p95 = sorted(self.latencies)[int(len(self.latencies) * 0.95)]
+        return min(self.max_budget, max(self.min_budget, 1.5 * p95))
+
+    async def ask_model(self, game_state, candidates, situation, max_retries=3, attempt=None, deadline=None):
+        """The model's pick among `candidates`, None if it doesn't give a valid one
+
+        The answer is constrained by a JSON schema to the candidates' names
+        (all affordable) and skip_turn, so retries are only for failed requests.
+        `attempt` gets the retry count and last error as they happen. The
+        answer is cached under `situation` and the model that gave it.
+        Nothing is retried past `deadline` (time.monotonic()).
+        """
+        attempt = attempt if attempt is not None else {}
+        game_state = dict(game_state, ai_hand=[card.to_dict() for card in candidates])
+        allowed = {card.card_id for card in candidates}
         retries = 0
         last_error = None
         
         while retries < max_retries:
             game_state['ai_resources'] = self.resources
-            message = self.create_prompt(game_state, last_error)
+            if self.chat:
+                message = {"role": "user", "content": self.create_chat_message(game_state, last_error)}
+                path = "/api/chat"
+                payload = {
+                    "model": MODEL,
+                    "messages": list(self.chat_history) + [message],
+                    "format": move_schema(candidates),
+                    "stream": False,
+                    "keep_alive": KEEP_ALIVE,
+                }
+            else:
+                path = "/api/generate"
+                payload = {
+                    "model": MODEL,
+                    "prompt": self.create_prompt(game_state, last_error),
+                    "format": move_schema(candidates),
+                    "stream": False,
+                    "keep_alive": KEEP_ALIVE,
+                }
 
-            payload = {
-                "model": "granite3-dense",
-                "prompt": message,
-                "format": "json",
-                "stream": False,
-            }
-
-            session = await self.get_session()
             try:
-                async with session.post(f"{self.server_url}/api/generate", json=payload) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        content = data.get('response', '')
-                        try:
-                            ai_response = json.loads(content)
-                            if ai_response and isinstance(ai_response, dict):
-                                card_name = ai_response.get("card_name", "")
-                                if card_name:
-                                    if card_name.lower() == "skip_turn":
-                                        print(f"AI skipping turn to gain 1 resource (Current: {self.resources})")
-                                        return self.skip_card
-                                    
-                                    for card in self.hand:
-                                        if card.name.lower() == card_name.lower():
-                                            if self.can_play_card(card):
-                                                print(f"AI playing {card.name}")
-                                                return card
-                                            else:
-                                                last_error = f"Insufficient resources for {card.name}"
-                                                break
-                                    else:
-                                        last_error = f"Card {card_name} not found in hand"
-                        except json.JSONDecodeError:
-                            last_error = "Failed to parse AI response as JSON"
-
+                data = await self.client.request(path, payload, priority=DECISION, deadline=deadline)
+            except StaleRequest:
+                break
+            except asyncio.TimeoutError as e:
+                if deadline is not None and time.monotonic() >= deadline:
+                    attempt['error'] = "Missed the decision budget"
+                    break
+                last_error = f"Network error: {str(e)}"
             except Exception as e:
                 last_error = f"Network error: {str(e)}"
+            else:
+                # Outside the try: a cache or log error is not a network error
+                if data is not None:
+                    self.decision_stats['prompt_eval_tokens'] += data.get('prompt_eval_count', 0)
+                    version = self.version(data.get('model') or MODEL)
+                    key = decision_key(*situation, version)
+                    if self.chat:
+                        content = data.get('message', {}).get('content', '')
+                        self.remember(message, content, game_state)
+                    else:
+                        content = data.get('response', '')
+                    try:
+                        ai_response = json.loads(content)
+                    except json.JSONDecodeError:
+                        ai_response = None
+                        last_error = "Failed to parse AI response as JSON"
+                    if ai_response is not None:
+                        card_name = str(ai_response.get("card_name", "")) if isinstance(ai_response, dict) else ""
+                        if card_name.lower() == "skip_turn":
+                            self.decisions.put(key, self.skip_card.name)
+                            self.decision_log.record(game_state, candidates, self.skip_card, version)
+                            return self.skip_card
+
+                        card = REGISTRY.lookup(card_name)
+                        if card is not None and card.card_id in allowed:
+                            self.decisions.put(key, card.name)
+                            self.decision_log.record(game_state, candidates, card, version)
+                            return card
+                        last_error = f"Card {card_name} is not one of the options"
 
             retries += 1
             if not last_error:
                 last_error = "Response format error"
+            attempt['retries'] = retries
+            attempt['error'] = last_error
+            if deadline is not None and time.monotonic() + 0.5 >= deadline:
+                break  # No time left for another try
             await asyncio.sleep(0.5)  # Add small delay between retries
             
         print("AI failed to make a valid decision")
-        return self.skip_card
+        return None
 
     def end_turn(self, deck):
         # Return only non-skip cards to the deck
-        unused_cards = [card for card in self.hand if card != self.skip_card and card.effect != "skip"]
-        deck.extend(unused_cards)
+        deck.extend(card for card in self.hand if card is not self.skip_card)
         # Reset hand to only have the skip card
         self.hand = [self.skip_card]
+        self.zobrist = HAND_KEYS[self.skip_card.card_id]
 
-    def create_prompt(self, game_state, last_error=None):
-        prompt = "{"
-        prompt += "\"ai_hand\": [\n"
-        for card in game_state['ai_hand']:
-            prompt += f"    {{\"name\": \"{card['name']}\", \"attack\": {card['attack']}, \"defense\": {card['defense']}, \"effect\": \"{card['effect']}\", \"cost\": {card['cost']}}},\n"
-        prompt += f"  ]\n" \
-              f"}}\n" \
-              f"You have {game_state['ai_resources']} resources and {game_state['ai_health']} health. Opponent health is {game_state['player_health']}. " \
-              f"Cards left: {len(game_state['deck'])}. "
-        
+    def chat_state(self, game_state):
+        return {
+            'your health': game_state['ai_health'],
+            'your resources': game_state['ai_resources'],
+            'opponent health': game_state['player_health'],
+            'opponent shield': game_state.get('player_defense', 0),
+            'cards left': len(game_state['deck']),
+        }
+
+    def create_chat_message(self, game_state, last_error=None):
+        """The whole state and every card for the first message of a match, after that only what changed"""
+        cards = [REGISTRY.by_name(card['name']) for card in game_state['ai_hand']]
+        if self.chat_seen is None:
+            prompt, _ = encode_prompt(game_state, cards, last_error, with_legend=False)
+            prompt = legend(tuple(range(len(REGISTRY)))) + "\n" + prompt
+            tokens = count_tokens(prompt)
+            self.chat_legend = self.max_prompt_tokens is None or tokens <= self.max_prompt_tokens
+            if not self.chat_legend:
+                # Over budget: only the options, later messages name the cards they offer
+                prompt, tokens = encode_prompt(game_state, cards, last_error, True, self.max_prompt_tokens)
+            self.decision_stats['prompt_tokens'] += tokens
+            return prompt
+        state = self.chat_state(game_state)
+        changes = [f"{name} {value} (was {self.chat_seen[name]})"
+                   for name, value in state.items() if value != self.chat_seen[name]]
+        options = ", ".join(card_code(card) if self.chat_legend else f"{card_code(card)}={card.name}"
+                            for card in cards)
+        message = f"changed: {'; '.join(changes) or 'nothing'}\noptions: {options}\n"
         if last_error:
-            prompt += f"Previous attempt failed because: {last_error}. "
-            prompt += f"Cards in hand: "
-            for card in game_state['ai_hand']:
-                prompt += f"\"{card['name']}\","
-        prompt += "Choose a valid card, Respond in JSON format {{\"card_name\": \"[Card Name]\"}}."
+            message += f"last answer rejected: {last_error}\n"
+        message += 'Answer {"card_name": "<card name>"}.'
+        self.decision_stats['prompt_tokens'] += count_tokens(message)
+        return message
+
+    def remember(self, message, answer, game_state):
+        history = self.chat_history + (message, {"role": "assistant", "content": answer})
+        if len(history) > self.max_history:
+            # Keep the opening exchange and the recent half; trimming is rare so
+            # the server can reuse its cache for the unchanged start most turns
+            history = history[:2] + history[-2 * (self.max_history // 4):]
+        self.chat_history = history
+        self.chat_seen = self.chat_state(game_state)
 
-        # print(prompt)
+    def adopt(self, other):
+        """Take over the conversation and held back decisions of a clone whose move was used (see prefetch.py)"""
+        self.chat_history = other.chat_history
+        self.chat_seen = other.chat_seen
+        self.chat_legend = other.chat_legend
+        if other.held is not None:
+            for name, value in other.decision_stats.items():
+                self.decision_stats[name] += value
+            for held in other.held:
+                self.report(*held)
+
+    def create_prompt(self, game_state, last_error=None, with_legend=True):
+        # Compact and capped at max_prompt_tokens, see prompt.py
+        cards = [REGISTRY.by_name(card['name']) for card in game_state['ai_hand']]
+        prompt, tokens = encode_prompt(game_state, cards, last_error, with_legend, self.max_prompt_tokens)
+        self.decision_stats['prompt_tokens'] += tokens
         return prompt
 
-    async def generate_narrative(self, action):
+    async def _generate_text(self, payload, priority, on_text=None, prefix=""):
+        """The model's `response` text, or None if the request failed.
+
+        With `on_text` the answer is streamed (Ollama sends one JSON object per
+        line) and on_text gets the narrative_commentary written so far after
+        every chunk, `prefix` in front.
+        """
+        payload = dict(payload, stream=on_text is not None)
+        if on_text is None:
+            data = await self.client.request("/api/generate", payload, priority=priority)
+            return data.get('response', '') if data is not None else None
+
+        parts = []
+        shown = ""
+
+        def on_chunk(chunk):
+            nonlocal shown
+            parts.append(chunk.get('response', ''))
+            text = partial_field("".join(parts), 'narrative_commentary')
+            if text and text != shown:
+                shown = text
+                on_text(prefix + text.lstrip())
+
+        last = await self.client.request("/api/generate", payload, priority=priority, on_chunk=on_chunk)
+        return "".join(parts) if last is not None else None
+
+    async def generate_narrative(self, action, on_text=None, priority=NARRATIVE):
         prompt = f"Provide a narrative commentary for the following action:\n{action}\n. Respond in JSON with narrative_commentary. Keep response short and concise."
         payload = {
-            "model": "granite3-dense",
+            "model": MODEL,
             "prompt": prompt,
             "format": "json",
             "stream": False,
+            "keep_alive": KEEP_ALIVE,
         }
-        
-        session = await self.get_session()
+        # Add bullet/arrow based on who is acting
+        prefix = "● " if "Player used" in action else "▶ "
+
         try:
-            async with session.post(f"{self.server_url}/api/generate", json=payload) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    content = data.get('response', '')
-                    try:
-                        narrative_response = json.loads(content)
-                        commentary = narrative_response.get('narrative_commentary', '')
-                        # Add bullet/arrow based on who is acting
-                        prefix = "● " if "Player used" in action else "▶ "
-                        return f"{prefix}{commentary.strip()}"
-                    except json.JSONDecodeError:
-                        return "▶ The battle continues..."
+            content = await self._generate_text(payload, priority, on_text, prefix)
+            if content is not None:
+                try:
+                    narrative_response = json.loads(content)
+                    commentary = narrative_response.get('narrative_commentary', '')
+                    return f"{prefix}{commentary.strip()}"
+                except json.JSONDecodeError:
+                    return "▶ The battle continues..."
         except Exception:
             return "▶ The battle continues..."
         
         return "▶ The battle continues..."
 
-    async def generate_introduction(self):
-        prompt = "Provide a motivational, welcoming message for the player general at the start of the game."
+    async def generate_introduction(self, on_text=None):
+        prompt = ("Provide a motivational, welcoming message for the player general at the start of the game. "
+                  "Respond in JSON with narrative_commentary.")
         payload = {
-            "model": "granite3-dense",
+            "model": MODEL,
             "prompt": prompt,
             "format": "json",
             "stream": False,
+            "keep_alive": KEEP_ALIVE,
         }
         
-        session = await self.get_session()
         try:
-            async with session.post(f"{self.server_url}/api/generate", json=payload) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    content = data.get('response', '')
-                    try:
-                        intro_response = json.loads(content)
-                        message = intro_response.get('narrative_commentary', '')
-                        return message.strip()
-                    except json.JSONDecodeError:
-                        return "Welcome to the battle, General!"
+            content = await self._generate_text(payload, INTRO, on_text)
+            if content is not None:
+                try:
+                    intro_response = json.loads(content)
+                    message = intro_response.get('narrative_commentary', '').strip()
+                    return message or "Welcome to the battle, General!"
+                except json.JSONDecodeError:
+                    return "Welcome to the battle, General!"
         except Exception:
             return "Welcome to the battle, General!"
         
         return "Welcome to the battle, General!"
 
+    async def warm_up(self):
+        """Load the model and run one tiny generation so the first turn isn't the slow one.
+
+        Returns the seconds it took, None if the server didn't answer or refused.
+        """
+        started = time.perf_counter()
+        try:
+            # An empty request only loads the model (and keeps it loaded)
+            answer = await self.client.request("/api/generate", {"model": MODEL, "stream": False, "keep_alive": KEEP_ALIVE},
+                                               priority=DECISION)
+            if answer is not None:
+                answer = await self.client.request("/api/generate", {
+                    "model": MODEL,
+                    "prompt": "Ready?",
+                    "stream": False,
+                    "keep_alive": KEEP_ALIVE,
+                    "options": {"num_predict": 1},
+                }, priority=DECISION)
+        except Exception as e:
+            print(f"Model warm-up failed: {e!r}")
+            return None
+        if answer is None:
+            print(f"Model warm-up failed: the server refused the request (is {MODEL} pulled?)")
+            return None
+        seconds = time.perf_counter() - started
+        print(f"Model warmed up in {seconds:.1f}s")
+        return seconds
+
     async def cleanup(self):
-        if self.session:
-            await self.session.close()
-            self.session = None
+        self.decisions.close()
+        self.decision_log.close()
+        await self.client.close()
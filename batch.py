@@ -0,0 +1,260 @@
+# batch.py
+import numpy as np
+from card import REGISTRY, SKIP_CARD
+from engine import BASE_CARDS, GameEngine
+from player import Player
+
+SKIP = SKIP_CARD.card_id
+NO_WINNER, PLAYER_WINS, AI_WINS, TIE = -1, 0, 1, 2
+
+
+class BatchSimulator:
+    """N games in lockstep, stored as NumPy arrays instead of objects.
+
+    Every per-player array has shape (2, N): row 0 is the player, row 1 the
+    AI. Hands and the deck are uint8 count vectors indexed by card id; the
+    skip card column stays empty since both sides always hold one. The turn
+    flow is the same as
+    `GameEngine.play`, applied with masks so games at different points of a
+    turn can share one step.
+    """
+
+    def __init__(self, n_games, seed=None, registry=REGISTRY, deck=None, hand_size=3):
+        self.cards = registry.cards
+        self.n = n_games
+        self.rng = np.random.default_rng(seed)
+        self.hand_size = hand_size
+
+        # Card table, one entry per card type
+        self.attack = np.array([c.attack for c in self.cards], dtype=np.int32)
+        self.defense_gain = np.array([c.defense for c in self.cards], dtype=np.int32)
+        self.cost = np.array([c.cost for c in self.cards], dtype=np.int32)
+        self.piercing = np.array([c.piercing for c in self.cards], dtype=bool)
+        # Effect parameters come from cards.json, like the compiled effects
+        heals = [c.effect in ("heal", "heal_full") for c in self.cards]
+        self.heal = np.array([c.effect_params["amount"] if h else 0 for c, h in zip(self.cards, heals)], dtype=np.int32)
+        self.heal_cap = np.array([c.effect_params["cap"] if h else 0 for c, h in zip(self.cards, heals)], dtype=np.int32)
+        self.stun = np.array([c.effect == "skip_turn" for c in self.cards], dtype=bool)
+        self.bonus = np.array([c.effect_params["amount"] if c.effect == "add_resources" else 0
+                               for c in self.cards], dtype=np.int32)
+
+        n_types = len(self.cards)
+        self.health = np.full((2, n_games), 100, dtype=np.int32)
+        self.defense = np.zeros((2, n_games), dtype=np.int32)
+        self.resources = np.full((2, n_games), 10, dtype=np.int32)
+        self.skip_next_turn = np.zeros((2, n_games), dtype=bool)
+        self.hand = np.zeros((2, n_games, n_types), dtype=np.uint8)
+        counts = registry.counts(deck if deck is not None else registry.deck_cards())
+        self.deck = np.tile(np.array(counts, dtype=np.uint8), (n_games, 1))
+        self.deck_size = np.full(n_games, sum(counts), dtype=np.int32)
+
+        self.to_move = np.zeros(n_games, dtype=np.int8)
+        self.ai_moves_left = np.zeros(n_games, dtype=np.int8)
+        self.turn = np.zeros(n_games, dtype=np.int32)
+        self.winner = np.full(n_games, NO_WINNER, dtype=np.int8)
+        self._games = np.arange(n_games)
+
+    @property
+    def active(self):
+        return self.winner == NO_WINNER
+
+    def start(self):
+        everyone = np.ones(self.n, dtype=bool)
+        self._draw(0, everyone)
+        self._draw(1, everyone)
+
+    def legal(self, seats=None):
+        """(N, T) mask of affordable cards in the hand of the side to move"""
+        seats = self.to_move if seats is None else seats
+        hand = self.hand[seats, self._games]
+        return (hand > 0) & (self.cost[None, :] <= self.resources[seats, self._games][:, None])
+
+    def random_policy(self):
+        """Uniform over the cards in hand like `engine.random_policy`"""
+        seats = self.to_move
+        weights = np.where(self.legal(seats), self.hand[seats, self._games], 0)
+        weights[:, SKIP] = 1
+        return self._sample(weights)
+
+    def step(self, cards):
+        """Every active game plays `cards[i]` for its side to move"""
+        mask = self.active
+        seats = self.to_move.astype(np.intp)
+        self.apply_cards(seats, cards, mask & (cards != SKIP))
+        self._check_winner(mask)
+        mask &= self.active
+
+        from_player = mask & (seats == 0)
+        self.ai_moves_left[from_player] = 1
+        from_ai = mask & (seats == 1)
+        self.ai_moves_left[from_ai] -= 1
+        again = from_ai & (self.ai_moves_left > 0)
+        self._redeal(again)
+        self._check_winner(again)
+        self._next_ai_move(mask & self.active)
+
+    def run(self, policy=None, max_turns=500):
+        """Play every game out; returns the winner array"""
+        policy = policy or BatchSimulator.random_policy
+        while True:
+            self.winner[self.active & (self.turn >= max_turns)] = TIE
+            if not self.active.any():
+                return self.winner
+            self.step(policy(self))
+
+    def apply_cards(self, seats, cards, mask):
+        """Vectorised `Player.play_card` + `Card.apply_effect`"""
+        me = seats
+        opp = 1 - seats
+        idx = self._games[mask]
+        me, opp = me[mask], opp[mask]
+        card = cards[mask]
+
+        self.resources[me, idx] = np.maximum(self.resources[me, idx] - self.cost[card], 0)
+
+        # Shields soak up non-piercing damage first
+        damage = self.attack[card]
+        absorbed = np.where(self.piercing[card], 0, np.minimum(self.defense[opp, idx], damage))
+        self.defense[opp, idx] -= absorbed
+        self.health[opp, idx] -= damage - absorbed
+
+        self.defense[me, idx] += self.defense_gain[card]
+
+        heal = self.heal[card]
+        healed = np.minimum(self.health[me, idx] + heal, self.heal_cap[card])
+        self.health[me, idx] = np.where(heal > 0, healed, self.health[me, idx])
+        stunned = self.stun[card]
+        self.skip_next_turn[opp[stunned], idx[stunned]] = True
+        self.resources[me, idx] += self.bonus[card]
+
+        self.hand[me, idx, card] -= 1
+
+    def _next_ai_move(self, mask):
+        while mask.any():
+            for _ in range(2):
+                stunned = mask & (self.ai_moves_left > 0) & self.skip_next_turn[1]
+                self.skip_next_turn[1, stunned] = False
+                self.ai_moves_left[stunned] -= 1
+            ai = mask & (self.ai_moves_left > 0)
+            self.to_move[ai] = 1
+            mask = self._end_turn(mask & ~ai)
+
+    def _end_turn(self, mask):
+        """Returns the games where the player is stunned and the AI moves again"""
+        self.turn[mask] += 1
+        self.resources[:, mask] += 1
+        self._redeal(mask)
+        self._check_winner(mask)
+        mask = mask & self.active
+
+        stunned = mask & self.skip_next_turn[0]
+        self.skip_next_turn[0, stunned] = False
+        self.ai_moves_left[stunned] = 2
+        self.to_move[mask & ~stunned] = 0
+        return stunned
+
+    def _redeal(self, mask):
+        idx = np.flatnonzero(mask)
+        if not len(idx):
+            return
+        returned = self.hand[0, idx] + self.hand[1, idx]
+        self.deck[idx] += returned
+        self.deck_size[idx] += returned.sum(axis=1, dtype=np.int32)
+        self.hand[:, idx] = 0
+        self._draw(0, idx)
+        self._draw(1, idx)
+
+    def _draw(self, seat, idx):
+        if not isinstance(idx, np.ndarray) or idx.dtype == bool:
+            idx = np.flatnonzero(idx)
+        # Uniform pick from the remaining counts, same odds as shuffle-then-pop
+        for _ in range(self.hand_size):
+            idx = idx[self.deck_size[idx] > 0]
+            if not len(idx):
+                return
+            card = self._sample(self.deck[idx], self.deck_size[idx])
+            self.deck[idx, card] -= 1
+            self.deck_size[idx] -= 1
+            self.hand[seat, idx, card] += 1
+
+    def _sample(self, weights, totals=None):
+        totals = weights.sum(axis=1) if totals is None else totals
+        pick = (self.rng.random(len(weights)) * totals).astype(np.int32)
+        # Running sum over the few card columns beats cumsum along axis 1
+        running = np.zeros(len(weights), dtype=np.int32)
+        choice = np.zeros(len(weights), dtype=np.intp)
+        for column in weights.T:
+            running += column
+            choice += running <= pick
+        return choice
+
+    def _check_winner(self, mask):
+        idx = np.flatnonzero(mask & (self.winner == NO_WINNER))
+        if not len(idx):
+            return
+        # Same order of checks as Game.check_winner
+        player, ai = self.health[0, idx], self.health[1, idx]
+        by_health = np.where(player > ai, PLAYER_WINS, np.where(ai > player, AI_WINS, TIE))
+        result = np.where(player <= 0, AI_WINS,
+                          np.where(ai <= 0, PLAYER_WINS,
+                                   np.where(self.deck_size[idx] == 0, by_health, NO_WINNER)))
+        self.winner[idx] = result
+
+def check_parity(trials=5000, games=4000, seed=0):
+    """Compare the batch math and win rates against the scalar Player/Card path"""
+    rng = np.random.default_rng(seed)
+    sim = BatchSimulator(trials, seed=seed)
+
+    # 1) One card on random states must match Player.play_card exactly
+    cards = rng.choice([card.card_id for card in BASE_CARDS], trials)
+    seats = rng.integers(0, 2, trials).astype(np.intp)
+    sim.health[:] = rng.integers(1, 101, (2, trials))
+    sim.defense[:] = rng.integers(0, 30, (2, trials))
+    sim.resources[:] = rng.integers(0, 20, (2, trials))
+    sim.resources[seats, sim._games] = np.maximum(sim.resources[seats, sim._games], sim.cost[cards])
+    sim.skip_next_turn[:] = False
+    sim.hand[seats, sim._games, cards] = 1
+
+    expected = []
+    for i in range(trials):
+        players = [Player("You"), Player("AI Opponent")]
+        for seat, p in enumerate(players):
+            p.health = int(sim.health[seat, i])
+            p.defense = int(sim.defense[seat, i])
+            p.resources = int(sim.resources[seat, i])
+        card = sim.cards[cards[i]]
+        me, opp = players[seats[i]], players[1 - seats[i]]
+        me.hand.append(card)
+        me.play_card(card, opp)
+        expected.append([(p.health, p.defense, p.resources, p.skip_next_turn) for p in players])
+
+    sim.apply_cards(seats, cards, np.ones(trials, dtype=bool))
+    got = np.stack([sim.health, sim.defense, sim.resources, sim.skip_next_turn], axis=-1).transpose(1, 0, 2)
+    mismatches = int((got != np.array(expected)).any(axis=(1, 2)).sum())
+    assert mismatches == 0, f"{mismatches} of {trials} card plays differ from Player.play_card"
+
+    # 2) Whole games with random play must give the same outcome distribution
+    scalar = np.zeros(3)
+    for i in range(games):
+        engine = GameEngine(seed=seed + i)
+        engine.start()
+        name = engine.simulate()
+        scalar[{"You": PLAYER_WINS, "AI Opponent": AI_WINS}.get(name, TIE)] += 1
+    batch = BatchSimulator(games, seed=seed)
+    batch.start()
+    vector = np.bincount(batch.run(), minlength=3)[:3]
+    p_scalar, p_batch = scalar / games, vector / games
+    # Difference of two proportions, allow four standard errors
+    tolerance = 4 * np.sqrt(2 * p_scalar * (1 - p_scalar) / games) + 1e-9
+    assert (np.abs(p_scalar - p_batch) <= tolerance).all(), f"win rates differ: {p_scalar} vs {p_batch}"
+    return p_scalar, p_batch
+
+
+if __name__ == "__main__":
+    import time
+    print("parity (scalar, batch):", check_parity())
+    sim = BatchSimulator(100000, seed=1)
+    start = time.perf_counter()
+    sim.start()
+    sim.run()
+    print(f"{sim.n / (time.perf_counter() - start):.0f} games/s")
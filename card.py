@@ -1,6 +1,64 @@
 # card.py
+import inspect
+import json
+import os
+import pickle
+
+# Card definitions live in cards.json; add new cards there
+CARDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cards.json")
+DEFAULT_COPIES = 8  # Copies of each card in a fresh deck
+
+
+# Effect factories: each takes the card's params and returns f(player, opponent)
+def _heal(amount=10, cap=100):
+    def apply(player, opponent):
+        player.health = min(player.health + amount, cap)  # Cap health
+    return apply
+
+
+def _stun():
+    def apply(player, opponent):
+        opponent.skip_next_turn = True  # Set opponent's next turn to be skipped
+    return apply
+
+
+def _add_resources(amount=5):
+    def apply(player, opponent):
+        player.resources += amount  # Generate additional resources
+    return apply
+
+
+EFFECTS = {
+    None: None,
+    "skip": None,  # Handled by the turn logic, not the card
+    "heal": _heal,
+    "heal_full": lambda amount=40, cap=100: _heal(amount, cap),
+    "skip_turn": _stun,
+    "add_resources": _add_resources,
+    # ...add other effects as needed...
+}
+
+
+def effect_params(effect, params=None):
+    """Params with the factory defaults filled in"""
+    factory = EFFECTS[effect]
+    if factory is None:
+        return {}
+    defaults = {name: p.default for name, p in inspect.signature(factory).parameters.items()}
+    return {**defaults, **(params or {})}
+
+
+def compile_effect(effect, params=None):
+    factory = EFFECTS[effect]
+    return factory(**effect_params(effect, params)) if factory else None
+
+
 class Card:
-    def __init__(self, name, attack=0, defense=0, effect=None, cost=0, description="", piercing=False):
+    __slots__ = ("name", "attack", "defense", "effect", "cost", "description", "piercing", "image_path",
+                 "effect_params", "effect_fn", "card_id")
+
+    def __init__(self, name, attack=0, defense=0, effect=None, cost=0, description="", piercing=False,
+                 params=None, image="default.jpg"):
         self.name = name
         self.attack = attack
         self.defense = defense
@@ -8,7 +66,10 @@ class Card:
         self.cost = cost  # Resource cost to play the card
         self.description = description  # Add this line
         self.piercing = piercing  # New property for shield penetration
-        self.image_path = self._get_image_path()
+        self.image_path = f"cards/{image}"
+        self.effect_params = effect_params(effect, params)
+        self.effect_fn = compile_effect(effect, self.effect_params)
+        self.card_id = None  # Set by CardRegistry.register
 
     def __str__(self):
         return f"{self.name} (ATK: {self.attack}, DEF: {self.defense}, Effect: {self.effect})"
@@ -23,37 +84,192 @@ class Card:
         }
 
     def apply_effect(self, player, opponent):
-        if self.effect == "heal":
-            player.health += 10  # Heal effect restores player's health
-            player.health = min(player.health, 100)  # Cap health at 100
-        elif self.effect == "heal_full":
-            player.health += 40
-            player.health = min(player.health, 100)  # Cap health at 100
-        elif self.effect == "skip_turn":
-            opponent.skip_next_turn = True  # Set opponent's next turn to be skipped
-            print(f"{opponent.name} will skip their next turn!")  # Debug print
-        elif self.effect == "add_resources":
-            player.resources += 5  # Generate additional resources
-        
-        # ...add other effects as needed...
-
-    def _get_image_path(self):
-        # Convert card name to image filename
-        image_map = {
-            "Laser Attack": "laser_attack.jpg",
-            "Shield Upgrade": "shield_block.jpg",
-            "Rocket Attack": "rocket_attack.jpg",
-            "Repair": "repair.jpg",
-            "Full Repair": "full_repair.jpg",
-            "Stun": "stun.jpg",
-            "Resource Generator": "resource_gen.jpg",
-            "Sabotage Attack": "sabotage.jpg",
-            "Intel Gathering": "intelligence.jpg",
-            "Skip Turn": "skip.jpg"
-        }
-        filename = image_map.get(self.name, "default.jpg")
-        return f"cards/{filename}"
+        if self.effect_fn is not None:
+            self.effect_fn(player, opponent)
+
+    def __reduce__(self):
+        # Registered cards travel as their id (e.g. to search worker processes),
+        # the compiled effect is rebuilt on the other side
+        if self.card_id is not None and self.card_id < len(REGISTRY) and REGISTRY[self.card_id] is self:
+            return (_registered_card, (self.card_id,))
+        return (Card, (self.name, self.attack, self.defense, self.effect, self.cost, self.description,
+                       self.piercing, self.effect_params, os.path.basename(self.image_path)))
 
     @classmethod
     def create_skip_card(cls):
-        return cls("Skip Turn", attack=0, defense=0, effect="skip", cost=0, description="Skip this turn and gain +1⬣ resource.")
+        return REGISTRY.register(cls("Skip Turn", effect="skip", description="Skip this turn and gain +1⬣ resource.", image="skip.jpg"))
+
+
+class CardRegistry:
+    """One shared Card per card type, addressed by a small integer id.
+
+    Cards never change after creation, so decks and hands only need to
+    reference these prototypes (or store their ids) instead of copies.
+    `effects` is the compiled effect table, indexed by the same ids.
+    """
+
+    MAX_CARDS = 256  # ids have to fit in a byte for array('B') decks
+
+    def __init__(self, cards=()):
+        self.cards = []
+        self.effects = []
+        self.copies = []
+        self._by_name = {}
+        self._by_lower_name = {}  # For names typed by people or models
+        for card in cards:
+            self.register(card)
+
+    def register(self, card, copies=0):
+        """Add a card type and return its prototype (the existing one for a known name)"""
+        existing = self._by_name.get(card.name)
+        if existing is not None:
+            return existing
+        if len(self.cards) >= self.MAX_CARDS:
+            raise ValueError(f"Too many card types, at most {self.MAX_CARDS}")
+        card.card_id = len(self.cards)
+        self.cards.append(card)
+        self.effects.append(card.effect_fn)
+        self.copies.append(copies)
+        self._by_name[card.name] = card
+        self._by_lower_name[card.name.lower()] = card
+        return card
+
+    def by_name(self, name):
+        return self._by_name.get(name)
+
+    def lookup(self, name):
+        """Card by name, ignoring case and surrounding spaces"""
+        return self._by_lower_name.get(name.strip().lower())
+
+    def __getitem__(self, card_id):
+        return self.cards[card_id]
+
+    def __len__(self):
+        return len(self.cards)
+
+    def __iter__(self):
+        return iter(self.cards)
+
+    def counts(self, cards):
+        """Per-type count vector for any iterable of cards"""
+        counts = [0] * len(self.cards)
+        for card in cards:
+            counts[card.card_id] += 1
+        return counts
+
+    def __reduce__(self):
+        if self is REGISTRY:
+            return (_default_registry, ())
+        return (CardRegistry, (self.cards,))
+
+    def deck_cards(self):
+        """Every card of a fresh deck, `copies` of each type"""
+        return [card for card, copies in zip(self.cards, self.copies) for _ in range(copies)]
+
+
+_CARD_FIELDS = {"name", "attack", "defense", "effect", "params", "cost", "description", "piercing", "image", "copies"}
+_CACHE_VERSION = 1
+
+
+def _validate(data, path):
+    """Check the raw JSON once and return normalised card records"""
+    if not isinstance(data, dict) or not isinstance(data.get("cards"), list):
+        raise ValueError(f"{path}: expected an object with a 'cards' list")
+
+    records = []
+    names = set()
+    for i, raw in enumerate(data["cards"]):
+        where = f"{path}: card #{i}"
+        if not isinstance(raw, dict):
+            raise ValueError(f"{where} is not an object")
+        unknown = set(raw) - _CARD_FIELDS
+        if unknown:
+            raise ValueError(f"{where} has unknown fields {sorted(unknown)}")
+        name = raw.get("name")
+        if not isinstance(name, str) or not name:
+            raise ValueError(f"{where} needs a name")
+        if name in names:
+            raise ValueError(f"{path}: duplicate card '{name}'")
+        names.add(name)
+
+        effect = raw.get("effect")
+        if effect not in EFFECTS:
+            raise ValueError(f"{path}: '{name}' has unknown effect '{effect}'")
+        params = raw.get("params", {})
+        if not isinstance(params, dict) or not set(params) <= set(effect_params(effect)):
+            raise ValueError(f"{path}: bad params for '{name}' ({effect}): {params}")
+
+        record = {
+            "name": name,
+            "attack": raw.get("attack", 0),
+            "defense": raw.get("defense", 0),
+            "cost": raw.get("cost", 0),
+            "copies": raw.get("copies", 0 if effect == "skip" else DEFAULT_COPIES),
+        }
+        for field, value in list(record.items())[1:] + list(params.items()):
+            if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+                raise ValueError(f"{path}: '{name}' {field} must be a non-negative integer")
+        record.update(
+            effect=effect,
+            params=params,
+            piercing=bool(raw.get("piercing", False)),
+            description=str(raw.get("description", "")),
+            image=str(raw.get("image", "default.jpg")),
+        )
+        records.append(record)
+
+    if sum(record["effect"] == "skip" for record in records) != 1:
+        raise ValueError(f"{path}: exactly one card must have the 'skip' effect")
+    # The skip card is always id 0
+    records.sort(key=lambda record: record["effect"] != "skip")
+    return records
+
+
+def _cache_path(path):
+    return os.path.join(os.path.dirname(path), "__pycache__", os.path.basename(path) + ".pickle")
+
+
+def _load_records(path):
+    """Validated records, from the pickle cache while the JSON is unchanged"""
+    stat = os.stat(path)
+    stamp = (_CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+    cache = _cache_path(path)
+    try:
+        with open(cache, "rb") as f:
+            cached_stamp, records = pickle.load(f)
+        if cached_stamp == stamp:
+            return records
+    except (OSError, pickle.PickleError, EOFError, ValueError):
+        pass
+
+    with open(path, encoding="utf-8") as f:
+        records = _validate(json.load(f), path)
+    try:
+        os.makedirs(os.path.dirname(cache), exist_ok=True)
+        with open(cache, "wb") as f:
+            pickle.dump((stamp, records), f)
+    except OSError:
+        pass  # Read-only install, just parse again next time
+    return records
+
+
+def load_cards(path=CARDS_FILE, registry=None):
+    """Build a registry from a card definition file"""
+    registry = registry if registry is not None else CardRegistry()
+    for record in _load_records(path):
+        record = dict(record)
+        copies = record.pop("copies")
+        registry.register(Card(**record), copies=copies)
+    return registry
+
+
+def _registered_card(card_id):
+    return REGISTRY[card_id]
+
+
+def _default_registry():
+    return REGISTRY
+
+
+REGISTRY = load_cards()
+SKIP_CARD = Card.create_skip_card()
@@ -0,0 +1,177 @@
+# decision_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+from zobrist import TranspositionTable
+
+CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "genmaczek", "decisions.sqlite")
+LOG_FILE = os.path.join(os.path.expanduser("~"), ".cache", "genmaczek", "decisions.jsonl")
+MODELFILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Modelfile")
+
+
+def model_version(model, modelfile=MODELFILE):
+    """Changes whenever the model name or the Modelfile does, so old answers are dropped"""
+    digest = hashlib.blake2b(model.encode(), digest_size=8)
+    try:
+        with open(modelfile, "rb") as f:
+            digest.update(f.read())
+    except OSError:
+        pass
+    return digest.hexdigest()
+
+
+def decision_key(cards, resources, health, opponent_health, deck_size, version):
+    """Canonical text key for a decision: the cards as a sorted multiset, numbers bucketed"""
+    names = ",".join(sorted(card.name for card in cards))
+    return f"{version}|{names}|r{min(resources, 20) // 2}|h{health // 10}|o{opponent_health // 10}|d{deck_size // 10}"
+
+
+class DecisionCache:
+    """Card choices by decision key: an LRU in memory in front of a SQLite file.
+
+    `capacity` bounds the memory tier, `disk_capacity` the file (least
+    recently used rows go first). Without a writable file it works from
+    memory only.
+    """
+
+    def __init__(self, path=CACHE_FILE, capacity=1024, disk_capacity=50000):
+        self.memory = TranspositionTable(capacity)
+        self.disk_capacity = disk_capacity
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.db = None
+        self._clock = 0
+        self.used = {}  # key -> use time of disk hits, written with the next put
+        if path:
+            try:
+                if path != ":memory:":
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                self.db = sqlite3.connect(path)
+                self.db.execute("CREATE TABLE IF NOT EXISTS decisions "
+                                "(key TEXT PRIMARY KEY, card TEXT NOT NULL, used INTEGER NOT NULL)")
+                self._clock = self.db.execute("SELECT COALESCE(MAX(used), 0) FROM decisions").fetchone()[0]
+            except (OSError, sqlite3.Error) as e:
+                print(f"Decision cache not persisted: {e}")
+                self.db = None
+
+    def get(self, key):
+        card_name = self.memory.get(key)
+        if card_name is None and self.db is not None:
+            try:
+                row = self.db.execute("SELECT card FROM decisions WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error as e:
+                print(f"Decision cache read failed: {e}")
+                row = None
+            if row is not None:
+                card_name = row[0]
+                self.disk_hits += 1
+                self.memory.put(key, card_name)
+                # Reads don't write: a write here would hold the file locked
+                # for the other connections until the next commit
+                self._clock += 1
+                self.used[key] = self._clock
+        if card_name is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return card_name
+
+    def put(self, key, card_name):
+        self.memory.put(key, card_name)
+        if self.db is not None:
+            self._clock += 1
+            self.used.pop(key, None)
+            try:
+                self.db.execute("INSERT OR REPLACE INTO decisions (key, card, used) VALUES (?, ?, ?)",
+                                (key, card_name, self._clock))
+                self._flush_used()
+                count = self.db.execute("SELECT COUNT(*) FROM decisions").fetchone()[0]
+                if count > self.disk_capacity:
+                    self.db.execute("DELETE FROM decisions WHERE key IN "
+                                    "(SELECT key FROM decisions ORDER BY used LIMIT ?)",
+                                    (count - self.disk_capacity,))
+                self.db.commit()
+            except sqlite3.Error as e:
+                print(f"Decision not cached on disk: {e}")
+                self.db.rollback()
+
+    def _flush_used(self):
+        """Write the use times of disk hits, in the transaction of the caller"""
+        if self.used:
+            self.db.executemany("UPDATE decisions SET used = ? WHERE key = ?",
+                                [(used, key) for key, used in self.used.items()])
+            self.used.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "disk_hits": self.disk_hits,
+                "hit_rate": self.hits / total if total else 0.0, "size": len(self.memory)}
+
+    def close(self):
+        if self.db is not None:
+            try:
+                self._flush_used()
+                self.db.commit()
+            except sqlite3.Error as e:
+                print(f"Decision cache not saved: {e}")
+            self.db.close()
+            self.db = None
+
+
+def decision_state(game_state):
+    """The numbers a decision prompt shows: health, resources, opponent health and shield, deck size"""
+    return [game_state['ai_health'], game_state['ai_resources'], game_state['player_health'],
+            game_state.get('player_defense', 0), len(game_state['deck'])]
+
+
+class DecisionLog:
+    """Every validated model decision as one JSON line, training data for policy.py.
+
+    A line is {"s": decision_state, "o": option card ids, "c": chosen card id,
+    "v": model version}. The file is opened on the first record.
+    """
+
+    def __init__(self, path=LOG_FILE):
+        self.path = path
+        self.file = None
+        self.records = 0
+
+    def record(self, game_state, candidates, card, version):
+        if self.path is None:
+            return
+        row = {"s": decision_state(game_state), "o": sorted({c.card_id for c in candidates}),
+               "c": card.card_id, "v": version}
+        try:
+            if self.file is None:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self.file = open(self.path, "a", encoding="utf-8")
+            self.file.write(json.dumps(row, separators=(",", ":")) + "\n")
+            self.file.flush()
+            self.records += 1
+        except OSError as e:
+            print(f"Decision not logged: {e}")
+            self.path = None  # Don't try again every turn
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def read_log(path=LOG_FILE, version=None):
+    """The rows of a decision log, only those for model `version` if given"""
+    rows = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue  # Cut off by a crash
+                if version is None or row.get("v") == version:
+                    rows.append(row)
+    except OSError:
+        pass
+    return rows
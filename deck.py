@@ -0,0 +1,78 @@
+# deck.py
+import random
+from array import array
+from card import REGISTRY
+from zobrist import DECK_KEYS, MASK, deck_key
+
+
+class Deck:
+    """Deck stored as one byte per card (registry ids).
+
+    Behaves like the old list of Cards where the game uses it: len(), pop(),
+    extend() and iteration all deal in the shared Card prototypes.
+
+    The deck is an unordered pool: pop() takes a uniformly random card by
+    swapping it with the last slot, so draws are O(1) and returned cards are
+    just appended. That gives the same odds as shuffling before every draw,
+    without paying for the shuffle.
+
+    `zobrist` is a hash of the deck's contents, updated on every change.
+    """
+
+    __slots__ = ("ids", "registry", "rng", "zobrist")
+
+    def __init__(self, cards=(), registry=REGISTRY, rng=None, seed=None):
+        self.registry = registry
+        self.rng = rng if rng is not None else random.Random(seed)
+        self.ids = array('B', (card.card_id for card in cards))
+        self.zobrist = deck_key(self.ids)
+
+    @classmethod
+    def from_ids(cls, ids, registry=REGISTRY, rng=None, zobrist=None):
+        deck = cls(registry=registry, rng=rng)
+        deck.ids = array('B', ids)
+        deck.zobrist = deck_key(deck.ids) if zobrist is None else zobrist
+        return deck
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        cards = self.registry.cards
+        return (cards[card_id] for card_id in self.ids)
+
+    def pop(self):
+        """Draw a random card"""
+        ids = self.ids
+        i = int(self.rng.random() * len(ids))
+        card_id = ids[i]
+        ids[i] = ids[-1]
+        ids.pop()
+        self.zobrist = (self.zobrist - DECK_KEYS[card_id]) & MASK
+        return self.registry.cards[card_id]
+
+    def remove(self, card):
+        """Take out one given card"""
+        ids = self.ids
+        i = ids.index(card.card_id)
+        ids[i] = ids[-1]
+        ids.pop()
+        self.zobrist = (self.zobrist - DECK_KEYS[card.card_id]) & MASK
+
+    def append(self, card):
+        self.ids.append(card.card_id)
+        self.zobrist = (self.zobrist + DECK_KEYS[card.card_id]) & MASK
+
+    def extend(self, cards):
+        for card in cards:
+            self.append(card)
+
+    def copy(self, rng=None):
+        return Deck.from_ids(self.ids, self.registry, rng, self.zobrist)
+
+    def counts(self):
+        """Per-type count vector, indexed by card id"""
+        counts = [0] * len(self.registry)
+        for card_id in self.ids:
+            counts[card_id] += 1
+        return counts
@@ -0,0 +1,124 @@
+# endgame.py
+import random
+from math import comb
+from card import REGISTRY
+from engine import reward
+
+ENDGAME_THRESHOLD = 2  # Solve exactly once the deck has this many cards or fewer
+HAND_SIZE = 3
+
+
+def _draws(counts, k, start=0):
+    """Every multiset of k cards from a per-type count vector, with its number of orderings"""
+    if k == 0:
+        yield (), 1
+        return
+    for card_id in range(start, len(counts)):
+        available = counts[card_id]
+        if not available:
+            continue
+        for taken in range(1, min(available, k) + 1):
+            counts[card_id] -= taken
+            for rest, ways in _draws(counts, k - taken, card_id + 1):
+                yield (card_id,) * taken + rest, ways * comb(available, taken)
+            counts[card_id] += taken
+
+
+def _outcomes(deck):
+    """(player cards, AI cards, probability) for one deal from the deck"""
+    counts = deck.counts()
+    size = len(deck)
+    player_k = min(HAND_SIZE, size)
+    ai_k = min(HAND_SIZE, size - player_k)
+    player_total = comb(size, player_k)
+    ai_total = comb(size - player_k, ai_k)
+    for player_ids, player_ways in list(_draws(counts, player_k)):
+        for card_id in player_ids:
+            counts[card_id] -= 1
+        for ai_ids, ai_ways in list(_draws(counts, ai_k)):
+            p = (player_ways / player_total) * (ai_ways / ai_total)
+            yield [REGISTRY[i] for i in player_ids], [REGISTRY[i] for i in ai_ids], p
+        for card_id in player_ids:
+            counts[card_id] += 1
+
+
+class EndgameSolver:
+    """Expectimax over the last few deals, memoised on the Zobrist key.
+
+    Chance nodes are deals (every hand with its exact probability), the AI
+    maximises and the player is assumed to answer with the move that is
+    worst for the AI. Values are the AI's result in [0, 1] (win 1, tie 0.5),
+    with the engine's health balance at the ply horizon. Within the horizon
+    the choice is optimal for that model.
+    """
+
+    def __init__(self, max_plies=8):
+        self.max_plies = max_plies
+        self.memo = {}
+        self.nodes = 0
+        self.rng = random.Random(0)  # Copies need one, deals are manual so it is never drawn from
+
+    def best_move(self, engine):
+        """(card, expected value) for the AI, which must be to move"""
+        if engine.to_move is not engine.ai_player:
+            raise ValueError("The endgame solver plays for the AI")
+        state = engine.clone(rng=self.rng)
+        state.manual_deal = True
+        # The player's hand is hidden: deal it again as a chance node
+        hidden = [card for card in state.player.hand if card is not state.player.skip_card]
+        state.player.end_turn(state.deck)
+        counts = state.deck.counts()
+        total = comb(len(state.deck), len(hidden))
+
+        values = {}
+        for player_ids, ways in list(_draws(counts, len(hidden))):
+            branch = state.clone(rng=self.rng)
+            for card_id in player_ids:
+                branch.deck.remove(REGISTRY[card_id])
+            branch.player.draw_cards([REGISTRY[i] for i in player_ids], len(player_ids))
+            for card_id, value in self._moves(branch, self.max_plies).items():
+                values[card_id] = values.get(card_id, 0.0) + value * ways / total
+
+        card_id = max(values, key=values.get)
+        return REGISTRY[card_id], values[card_id]
+
+    def _moves(self, state, plies):
+        """Value of each legal move for the side to move"""
+        values = {}
+        for card in state.legal_moves():
+            if card.card_id in values:
+                continue
+            child = state.clone(rng=self.rng)
+            child.play(card)
+            values[card.card_id] = self._value(child, plies - 1)
+        return values
+
+    def _value(self, state, plies):
+        if state.winner or plies <= 0:
+            return reward(state, state.ai_player)
+
+        # A value searched at least this deep is as good as a fresh one
+        key = state.state_key()
+        cached = self.memo.get(key)
+        if cached is not None and cached[0] >= plies:
+            return cached[1]
+        self.nodes += 1
+
+        if state.pending_deal:
+            if len(state.deck) <= 2 * HAND_SIZE:
+                # The deck runs out on this deal, which cards go where can't matter
+                state = state.clone(rng=self.rng)
+                state.deal(list(state.deck)[:HAND_SIZE], list(state.deck)[HAND_SIZE:])
+                value = self._value(state, plies)
+            else:
+                value = 0.0
+                for player_cards, ai_cards, p in _outcomes(state.deck):
+                    child = state.clone(rng=self.rng)
+                    child.deal(player_cards, ai_cards)
+                    value += p * self._value(child, plies)
+        else:
+            values = self._moves(state, plies).values()
+            value = max(values) if state.to_move is state.ai_player else min(values)
+
+        self.memo[key] = (plies, value)
+        return value
@@ -0,0 +1,209 @@
+# engine.py
+import copy
+import random
+from card import REGISTRY
+from deck import Deck
+from player import Player
+from logic import Game
+from zobrist import game_key
+
+# Every playable card type, see cards.json
+BASE_CARDS = [card for card in REGISTRY if card.effect != "skip"]
+
+
+def create_deck(rng=None):
+    return Deck(REGISTRY.deck_cards(), rng=rng)
+
+
+def reward(state, actor):
+    """1 for a win, 0 for a loss, health balance in between when unfinished"""
+    if state.winner:
+        if state.winner == actor.name:
+            return 1.0
+        if state.winner == state.opponent_of(actor).name:
+            return 0.0
+        return 0.5
+    opponent = state.opponent_of(actor)
+    balance = (actor.health + actor.defense / 2) - (opponent.health + opponent.defense / 2)
+    return min(1.0, max(0.0, 0.5 + balance / 200))
+
+
+def random_policy(engine, actor):
+    """Pick any legal card, skip card included."""
+    return engine.rng.choice(engine.legal_moves(actor))
+
+
+class GameEngine:
+    """Game rules without any Qt: one decision at a time, for either seat.
+
+    `to_move` is the player who has to pick a card next. `play()` applies that
+    card and runs everything up to the next decision: the AI reply, stuns,
+    returning cards, the resource tick and the new draw.
+
+    With `manual_deal` set the engine stops before every draw instead
+    (`pending_deal` is set and nobody is to move) until `deal()` is called
+    with the exact cards, which is how the endgame solver walks each outcome.
+    """
+
+    def __init__(self, player=None, ai_player=None, deck=None, seed=None):
+        self.rng = random.Random(seed)
+        self.player = player if player is not None else Player("You")
+        self.ai_player = ai_player if ai_player is not None else Player("AI Opponent")
+        if deck is None:
+            deck = create_deck(self.rng)
+        elif not isinstance(deck, Deck):
+            deck = Deck(deck, rng=self.rng)
+        self.deck = deck
+        self.game = Game(self.player, self.ai_player, self.deck)
+        self.winner = None
+        self.turn = 0
+        self.events = []  # (actor, card) per step of the last play(), card is None when stunned
+        self._ai_moves_left = 0
+        self.manual_deal = False
+        self.pending_deal = None  # Name of the step to resume after a manual deal
+
+    def start(self):
+        """Deal the opening hands; the player moves first."""
+        self.player.draw_cards(self.deck)
+        self.ai_player.draw_cards(self.deck)
+        self.game.current_turn = self.player
+
+    @property
+    def to_move(self):
+        return None if self.winner else self.game.current_turn
+
+    def opponent_of(self, actor):
+        return self.ai_player if actor is self.player else self.player
+
+    def legal_moves(self, actor=None):
+        actor = actor if actor is not None else self.game.current_turn
+        return [card for card in actor.hand if card.effect == "skip" or actor.can_play_card(card)]
+
+    def play(self, card):
+        """Play a card for the side to move and advance to the next decision"""
+        actor = self.to_move
+        if actor is None:
+            raise ValueError("Game is already over")
+        if card not in actor.hand:
+            raise ValueError(f"{card.name} is not in {actor.name}'s hand")
+        if card.effect != "skip" and not actor.can_play_card(card):
+            raise ValueError(f"Not enough resources for {card.name}")
+
+        self.events = [(actor, card)]
+        # The skip card never leaves the hand, it just passes the turn
+        if card.effect != "skip":
+            actor.play_card(card, self.opponent_of(actor))
+            if self._check_winner():
+                return
+
+        if actor is self.player:
+            self._ai_moves_left = 1
+            self._next_ai_move()
+        else:
+            self._ai_moves_left -= 1
+            if self._ai_moves_left > 0:
+                # Second move in a row (player stunned): AI gets a fresh hand
+                self._redeal("_after_ai_redeal")
+            else:
+                self._next_ai_move()
+
+    def deal(self, player_cards, ai_cards):
+        """Finish a paused deal (manual_deal) with the given cards from the deck"""
+        if self.pending_deal is None:
+            raise ValueError("No deal is pending")
+        for card in (*player_cards, *ai_cards):
+            self.deck.remove(card)
+        self.player.draw_cards(list(player_cards), len(player_cards))
+        self.ai_player.draw_cards(list(ai_cards), len(ai_cards))
+        resume, self.pending_deal = self.pending_deal, None
+        getattr(self, resume)()
+
+    def state_key(self):
+        """64-bit Zobrist key of the position, see zobrist.py"""
+        return game_key(self)
+
+    def simulate(self, player_policy=random_policy, ai_policy=random_policy, max_turns=500):
+        """Play the game out and return the winner's name"""
+        while self.to_move is not None and self.turn < max_turns:
+            actor = self.to_move
+            policy = player_policy if actor is self.player else ai_policy
+            self.play(policy(self, actor))
+        return self.winner or "No one"
+
+    def clone(self, seed=None, rng=None):
+        """Independent copy for search; cards themselves are shared
+
+        The copy draws from `rng` when given (a search can pass its own, which
+        is much cheaper), a new RNG from `seed`, or a copy of this one's state.
+        """
+        other = copy.copy(self)
+        other.player = self._copy_player(self.player)
+        other.ai_player = self._copy_player(self.ai_player)
+        if rng is not None:
+            other.rng = rng
+        elif seed is None:
+            other.rng = random.Random()
+            other.rng.setstate(self.rng.getstate())
+        else:
+            other.rng = random.Random(seed)
+        other.deck = self.deck.copy(other.rng)
+        other.game = Game(other.player, other.ai_player, other.deck)
+        other.game.current_turn = other.player if self.game.current_turn is self.player else other.ai_player
+        other.events = []
+        return other
+
+    def _copy_player(self, player):
+        clone = copy.copy(player)
+        clone.hand = list(player.hand)
+        return clone
+
+    def _next_ai_move(self):
+        while self._ai_moves_left > 0 and self.ai_player.skip_next_turn:
+            self.ai_player.skip_next_turn = False
+            self.events.append((self.ai_player, None))
+            self._ai_moves_left -= 1
+        if self._ai_moves_left > 0:
+            self.game.current_turn = self.ai_player
+        else:
+            self._end_turn()
+
+    def _redeal(self, then):
+        # Return unused cards and draw again, the deck draws at random
+        self.player.end_turn(self.deck)
+        self.ai_player.end_turn(self.deck)
+        if self.manual_deal:
+            self.game.current_turn = None
+            self.pending_deal = then
+            return
+        self.player.draw_cards(self.deck)
+        self.ai_player.draw_cards(self.deck)
+        getattr(self, then)()
+
+    def _after_ai_redeal(self):
+        if self._check_winner():
+            return
+        self._next_ai_move()
+
+    def _end_turn(self):
+        self.turn += 1
+        # Add resources at start of turn
+        self.player.resources += 1
+        self.ai_player.resources += 1
+        self._redeal("_after_end_turn")
+
+    def _after_end_turn(self):
+        if self._check_winner():
+            return
+
+        if self.player.skip_next_turn:
+            # Stunned player loses the turn and the AI plays twice
+            self.player.skip_next_turn = False
+            self.events.append((self.player, None))
+            self._ai_moves_left = 2
+            self._next_ai_move()
+        else:
+            self.game.current_turn = self.player
+
+    def _check_winner(self):
+        self.winner = self.game.check_winner()
+        return self.winner
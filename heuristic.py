@@ -0,0 +1,60 @@
+# heuristic.py
+# The Modelfile strategy as plain rules, so most AI turns need no model call
+
+EARLY_DECK = 60  # "Use Resource Generator early (>60 cards)"
+SURPLUS = 5  # Resources left over after playing that count as a surplus
+
+
+def damage(card, opponent_defense):
+    """Health damage the card does right now"""
+    if card.attack <= 0:
+        return 0
+    if card.piercing:
+        return card.attack
+    return max(0, card.attack - opponent_defense)
+
+
+def score_card(card, player, opponent, deck_size):
+    """Higher is better; the skip card scores 0"""
+    if card.effect == "skip":
+        return 0.0
+
+    left = player.resources - card.cost
+    score = 0.0
+
+    # Attack when the enemy is low or there's spare resources; a kill beats everything
+    hit = damage(card, opponent.defense)
+    if hit >= opponent.health:
+        return 1000.0 + hit
+    if hit:
+        score += hit * (1.5 if opponent.health < 50 or left >= SURPLUS else 1.0)
+    elif card.attack:
+        score += (card.attack - hit) * 0.3  # Still wears the shield down
+
+    # Shield when low on health
+    if card.defense:
+        score += card.defense * (2.0 if player.health < 30 else 0.5)
+
+    params = card.effect_params
+    if card.effect in ("heal", "heal_full"):
+        healed = max(0, min(player.health + params["amount"], params["cap"]) - player.health)
+        score += healed * (2.0 if player.health < 50 else 0.3)
+    elif card.effect == "add_resources":
+        score += params["amount"] * (2.0 if deck_size > EARLY_DECK else 0.5)
+    elif card.effect == "skip_turn":
+        score += 12.0 if not opponent.skip_next_turn else 1.0
+
+    return score - card.cost * 0.5
+
+
+def rank_moves(cards, player, opponent, deck_size):
+    """[(score, card)] for the playable cards, best first, one entry per card type"""
+    seen = set()
+    ranked = []
+    for card in cards:
+        if card.card_id in seen or not player.can_play_card(card):
+            continue
+        seen.add(card.card_id)
+        ranked.append((score_card(card, player, opponent, deck_size), card))
+    ranked.sort(key=lambda entry: -entry[0])
+    return ranked
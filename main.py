@@ -1,6 +1,6 @@
 # main.py
+import os
 import sys
-import random
 import asyncio
 import qasync
 from functools import partial
@@ -10,14 +10,22 @@ from PyQt5.QtCore import QTimer
 from PyQt5.QtGui import QIcon
 from PyQt5.QtCore import Qt
 from PyQt5.QtMultimedia import QSound
-from card import Card
 from player import Player
-from ai_player import AIPlayer
-from logic import Game
+from ai_player import AIPlayer, ai_game_state
+from decision_cache import DecisionCache
+from search_ai import SearchAIPlayer
+from engine import GameEngine
+from llm_client import NARRATIVE
+from narratives import NarrativePool, usable
+from pipeline import TurnPipeline
+from prefetch import MovePrefetcher
 from ui import GameUI
 
+# Model servers, see llm_client.parse_backends for pinning decisions and narration
+OLLAMA_SERVERS = os.environ.get("GENMACZEK_OLLAMA", "http://localhost:11434")
+
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, search_ai=False, policy=False):
         super().__init__()
         self.setWindowTitle("genMaczek - AI Card Battle Game")
         # Set fixed window size and disable resizing
@@ -28,18 +36,42 @@ class MainWindow(QMainWindow):
 
         # Initialize players and game
         self.player = Player("You")
-        self.ai_player = AIPlayer("AI Opponent", "http://localhost:11434")  # Ollama server
-        self.deck = self.create_deck()
-        self.game = Game(self.player, self.ai_player, self.deck)
-        self.narrative_ai = AIPlayer("NarrativeAI", "http://localhost:11434")
+        # One decision cache for both model players: two connections to the file would lock each other out
+        decisions = DecisionCache()
+        if search_ai:
+            self.ai_player = SearchAIPlayer("AI Opponent")  # Local search, no model server
+        else:
+            self.ai_player = AIPlayer("AI Opponent", OLLAMA_SERVERS, chat=True, decisions=decisions)  # Ollama server(s)
+            if policy:
+                # Trained by policy.py on earlier games' model decisions, needs numpy
+                from policy import Policy
+                self.ai_player.policy = Policy.load()
+                self.ai_player.policy_confidence = 0.7
+        self.engine = GameEngine(self.player, self.ai_player)
+        self.stun_note = ""  # Who lost a turn to a stun, shown until the player moves again
+        self.deck = self.engine.deck
+        self.game = self.engine.game
+        self.narrative_ai = AIPlayer("NarrativeAI", OLLAMA_SERVERS, decisions=decisions)
+        # Narratives come from a pool that is refilled while the AI isn't thinking
+        self.narratives = NarrativePool()
+        self.narrative_task = asyncio.ensure_future(self.narratives.refill(self.narrative_ai))
 
         # Players draw initial hands
-        self.player.draw_cards(self.deck)
-        self.ai_player.draw_cards(self.deck)
+        self.engine.start()
 
         # Set up UI elements
         self.ui = GameUI(self, self.player, self.ai_player, self.narrative_ai)
 
+        # The AI thinks about its answers while the player is still choosing,
+        # narratives are written while the AI thinks
+        self.prefetcher = MovePrefetcher()
+        self.pipeline = TurnPipeline()
+        self.ui.start_btn.clicked.connect(lambda: self.prefetcher.start(self.engine))
+
+        # While the intro screen shows: load the model and write the introduction
+        self.warmup_seconds = None
+        self.pipeline.spawn(self.start_up())
+
     def init_ui(self):
         layout = QVBoxLayout()
 
@@ -58,37 +90,12 @@ class MainWindow(QMainWindow):
         container.setLayout(layout)
         self.setCentralWidget(container)
 
-    def create_deck(self):
-        base_cards = [
-            Card("Laser Attack", attack=15, cost=2, description="Fires a piercing laser at the enemy."),
-            Card("Shield Upgrade", defense=10, cost=2, description="Deploys a shield to absorb damage."),
-            Card("Rocket Attack", attack=25, cost=5, description="Launches a powerful rocket at the opponent that can be blocked by shields."),
-            Card("Repair", effect="heal", cost=4, description="Repairs damage to restore 10 health."),
-            Card("Full Repair", effect="heal_full", cost=10, description="Fully restores 40 health."),
-            Card("Stun", effect="skip_turn", cost=3, description="Stuns the enemy, causing them to skip a turn."),
-            Card("Resource Generator", effect="add_resources", cost=2, description="Generates +5⬣ resources."),
-            Card("Sabotage Attack", attack=4, cost=2, description="Minor attack that bypasses enemy shields.", piercing=True),
-            Card("Intel Gathering", attack=2, cost=1, description="Gathers info while slightly damaging the enemy through shields.", piercing=True),
-            # ...add more unique cards as needed...
-        ]
-        # Increase the deck size more significantly
-        deck = base_cards * 8
-        random.shuffle(deck)
-        return deck
-
     def update_hand(self):
-        # First return any existing cards (except skip card)
-        self.player.end_turn(self.deck)
-        self.ai_player.end_turn(self.deck)
-        
-        # Then draw new cards
-        self.player.draw_cards(self.deck)
-        self.ai_player.draw_cards(self.deck)
-        
         # Update the UI and deck count
         self.ui.update_hand()
-        self.ui.update_deck_count(len(self.deck))  # Add this line
-        self.ui.show_cards(True)
+        self.ui.update_deck_count(len(self.deck))
+        self.ui.show_cards(True, self.stun_note + "Your turn!")
+        self.prefetcher.start(self.engine)
 
     def play_card(self, card):
         QSound.play("sfx/click.wav")
@@ -96,153 +103,122 @@ class MainWindow(QMainWindow):
 
     async def _play_card_async(self, card):
         """Async implementation of play_card"""
-        # Check if player is stunned at the start of their turn
-        if self.player.skip_next_turn:
-            self.player.skip_next_turn = False  # Reset stun
-            self.ui.status_label.setText("Turn skipped - Stunned!")
-            QApplication.processEvents()
-            
-            # AI gets to play twice when player is stunned
-            self.ui.show_waiting_message()
-            await self.ai_turn()  # First AI turn
-            await self.ai_turn()  # Second AI turn
-            self.update_stats()
-            
-            # Start new turn
-            self.end_turn()
+        if self.engine.to_move is not self.player:
             return
 
-        # Regular turn handling
-        self.ui.show_cards(False)
-
-        # Handle skip card
-        if card.effect == "skip":
-            self.ui.update_last_played(player_card=card)
-            await self.ai_turn()
-            self.end_turn()
-            return
-
-        if not self.player.can_play_card(card):
+        if card.effect != "skip" and not self.player.can_play_card(card):
             QMessageBox.warning(self, "Cannot Play Card", 
                               f"Not enough resources! (Cost: {card.cost}, Available: {self.player.resources})")
-            self.ui.show_cards(True)  # Show cards again if play was invalid
             return
 
-        # Player plays a card
-        self.player.play_card(card, self.ai_player)
+        # Regular turn handling
+        self.ui.show_cards(False)
+
+        # Player plays a card, the engine runs the turn up to the AI move
+        self.stun_note = ""
+        self.prefetcher.choose(card)
+        self.engine.play(card)
         self.ui.update_last_played(player_card=card)
         self.update_stats()
+        self.show_stuns()
 
         # Update deck count after player plays a card
         self.ui.update_deck_count(len(self.deck))
 
-        # Generate narrative for player's action with bullet
-        player_action = f"● Player used {card.name} against AI."  # Add bullet
-        narrative = await self.narrative_ai.generate_narrative(player_action)
-        self.ui.update_narrative(narrative)
-
-        # Check for win condition
-        winner = self.game.check_winner()
-        if winner:
-            self.ui.show_game_over(winner)
-            return
+        if card.effect != "skip":
+            self.narrate("Player", card)
 
-        # AI's turn
-        if not self.ai_player.skip_next_turn:
+        # AI's turn, twice in a row when the player is stunned
+        while self.engine.to_move is self.ai_player:
             await self.ai_turn()
-        else:
-            self.ai_player.skip_next_turn = False
 
-        # End turn and start new one
-        self.end_turn()
-
-        # Check for win condition again
-        winner = self.game.check_winner()
-        if winner:
-            self.ui.show_game_over(winner)
+        # Check for win condition
+        if self.engine.winner:
+            self.narrative_ai.client.drop(NARRATIVE)  # Nobody reads the log any more
+            await self.pipeline.drain()  # The dropped narratives finish up before the window changes
+            self.ui.show_game_over(self.engine.winner)
             return
 
-        # Don't update hand if player is stunned for next turn
-        if not self.player.skip_next_turn:
-            self.update_hand()
-            self.ui.show_cards(True)
-        else:
-            self.ui.status_label.setText("You are stunned for next turn!")
-            QApplication.processEvents()
+        self.narrative_ai.client.end_turn()
 
-    async def ai_turn(self):
-        # Check if AI is stunned
-        if self.ai_player.skip_next_turn:
-            self.ai_player.skip_next_turn = False
-            self.ui.status_label.setText("AI turn skipped - Stunned!")
-            QApplication.processEvents()
-            return
-
-        # Prepare game state to send to AI
-        game_state = {
-            'player_health': self.player.health,
-            'ai_health': self.ai_player.health,
-            'ai_resources': self.ai_player.resources,
-            'ai_hand': [card.to_dict() for card in self.ai_player.hand],
-            'deck': self.deck  # needed for draw_cards
-        }
+        self.update_hand()
+        self.update_stats()
 
+    async def ai_turn(self):
         # Show waiting label and process UI events
-        self.ui.show_waiting_message()
-        QApplication.processEvents()  # Force UI update
-
-        # Make AI move
-        ai_card = await self.ai_player.decide_move(game_state)
-
-        if ai_card:
-            # AI plays a card
-            self.ai_player.play_card(ai_card, self.player)
-            self.ui.update_last_played(ai_card=ai_card)
-            self.update_stats()
-            self.alert_window()  # Alert the window when AI responds
-
-            # Update deck count after AI plays a card
-            self.ui.update_deck_count(len(self.deck))
-
-            # Generate narrative for AI's action with arrow
-            ai_action = f"▶ AI used {ai_card.name} against Player."  # Add arrow
-            narrative = await self.narrative_ai.generate_narrative(ai_action)
-            self.ui.update_narrative(narrative)
-        else:
+        self.ui.show_waiting_message(self.stun_note + "AI is thinking...")
+        await asyncio.sleep(0)  # Let the UI repaint (processEvents here would re-enter other tasks)
+
+        # Make AI move, usually already worked out while the player was choosing
+        ai_card = await self.prefetcher.reply(self.engine)
+        if ai_card is None:
+            ai_card = await self.ai_player.decide_move(ai_game_state(self.engine))
+        if ai_card is None or ai_card not in self.engine.legal_moves(self.ai_player):
             # Handle case where AI didn't return a valid move
             print("AI did not play a card.")
-            # Optionally, implement logic for AI to skip turn or draw a card
-            pass
+            ai_card = self.ai_player.skip_card
 
-        # Check for win condition
-        winner = self.game.check_winner()
-        if winner:
-            self.ui.show_game_over(winner)
-            return
+        # AI plays a card
+        self.engine.play(ai_card)
+        self.ui.update_last_played(ai_card=ai_card)
+        self.update_stats()
+        self.show_stuns()
+        self.alert_window()  # Alert the window when AI responds
 
-        # Next turn
-        self.update_hand()
-        QSound.play("sfx/ai_voice.wav")  # Play sound when AI ends its turn
-
-    def end_turn(self):
-        # Return unused cards to the deck
-        self.player.end_turn(self.deck)
-        self.ai_player.end_turn(self.deck)
-        # Shuffle the deck after returning cards
-        random.shuffle(self.deck)
-        # Update deck count after returning cards
+        # Update deck count after AI plays a card
         self.ui.update_deck_count(len(self.deck))
-        # Start new turn
-        self.start_new_turn()
-
-    def start_new_turn(self):
-        # Add resources at start of turn
-        self.player.resources += 1
-        self.ai_player.resources += 1
-        
-        # Update UI
-        self.update_hand()
-        self.update_stats()
+
+        if ai_card.effect != "skip":
+            self.narrate("AI", ai_card)
+
+        if not self.engine.winner:
+            QSound.play("sfx/ai_voice.wav")  # Play sound when AI ends its turn
+
+    async def start_up(self):
+        block = self.ui.begin_narrative("")
+        intro = self.pipeline.spawn(self.narrative_ai.generate_introduction(
+            on_text=lambda text: self.ui.set_narrative(block, text)))
+        self.warmup_seconds = await self.ai_player.warm_up()
+        self.ui.set_narrative(block, await intro)
+
+    def narrate(self, actor, card):
+        if self.narratives.has(actor, card.name):
+            self.ui.update_narrative(self.narratives.get(actor, card.name))
+            return
+        # Nothing pooled yet: show the action now and stream a narrative over it
+        block = self.ui.begin_narrative(self.narratives.action(actor, card.name))
+        self.pipeline.spawn(self._stream_narrative(actor, card, block))
+
+    async def _stream_narrative(self, actor, card, block):
+        action = self.narratives.action(actor, card.name)
+        text = await self.narrative_ai.generate_narrative(
+            action, on_text=lambda text: self.ui.set_narrative(block, text))
+        if usable(text):
+            self.ui.set_narrative(block, text)
+            self.narratives.add(actor, card.name, text)
+            self.narratives.save()
+        else:
+            self.ui.set_narrative(block, action)  # Nothing came, the action stays
+
+    def show_stuns(self):
+        # The engine records a None card for every turn lost to a stun,
+        # the note stays in front of the status until the player moves again
+        for actor, card in self.engine.events:
+            if card is None:
+                if actor is self.player:
+                    self.stun_note = "Turn skipped - Stunned! "
+                else:
+                    self.stun_note = "AI turn skipped - Stunned! "
+                self.ui.status_label.setText(self.stun_note.strip())
+
+    async def shutdown(self):
+        """Stop the background work and close model connections, caches and logs"""
+        self.narrative_task.cancel()
+        self.prefetcher.cancel()
+        self.pipeline.cancel()
+        await self.pipeline.drain()  # No narrative outlives the window
+        await self.ai_player.cleanup()
+        await self.narrative_ai.cleanup()
 
     def update_stats(self):
         self.ui.update_stats()
@@ -254,21 +230,18 @@ class MainWindow(QMainWindow):
 
 def main():
     app = QApplication(sys.argv)
-    try:
-        loop = qasync.QEventLoop(app)
-        asyncio.set_event_loop(loop)
-        
-        window = MainWindow()
-        window.show()
-        
-        with loop:
+    loop = qasync.QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    window = None
+    with loop:
+        try:
+            window = MainWindow(search_ai="--search" in sys.argv, policy="--policy" in sys.argv)
+            window.show()
             loop.run_forever()
-    except:
-        # Clean up
-        if hasattr(window, 'ai_player'):
-            loop.run_until_complete(window.ai_player.cleanup())
-        if hasattr(window, 'narrative_ai'):
-            loop.run_until_complete(window.narrative_ai.cleanup())
+        finally:
+            # Also on a normal exit, and not at all if the window never got made
+            if window is not None:
+                loop.run_until_complete(window.shutdown())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
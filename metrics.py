@@ -0,0 +1,206 @@
+# metrics.py
+# What the model requests cost: latency, Ollama's timings and token counts, per kind and per turn
+import json
+import math
+import os
+import time
+from collections import Counter, OrderedDict, deque
+
+METRICS_DIR = os.path.join(os.path.expanduser("~"), ".cache", "genmaczek")
+KINDS = ("decision", "narrative", "intro", "background")  # By llm_client priority
+# Ollama's answer fields, durations in nanoseconds
+OLLAMA_FIELDS = ("total_duration", "load_duration", "prompt_eval_count", "prompt_eval_duration",
+                 "eval_count", "eval_duration")
+
+
+class Histogram:
+    """Streaming histogram with log-spaced buckets (5% wide): fixed memory, quantiles to within a bucket"""
+
+    def __init__(self, low=1e-4, high=1e5, growth=1.05):
+        self.low = low
+        self.log_growth = math.log(growth)
+        self.counts = [0] * (int(math.log(high / low) / self.log_growth) + 2)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, value):
+        if value <= self.low:
+            bucket = 0
+        else:
+            bucket = min(len(self.counts) - 1, 1 + int(math.log(value / self.low) / self.log_growth))
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper edge of the bucket holding the q-quantile, within [min, max]; 0 when empty"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                edge = self.low * math.exp(bucket * self.log_growth)
+                return min(max(edge, self.min), self.max)
+        return self.max
+
+    def summary(self):
+        if not self.count:
+            return {"count": 0}
+        return {"count": self.count, "mean": self.total / self.count, "min": self.min, "max": self.max,
+                "p50": self.quantile(0.5), "p95": self.quantile(0.95), "p99": self.quantile(0.99)}
+
+
+class Metrics:
+    """Every model request and AI decision, summed up as it goes.
+
+    LLMClient records each request with `request`: wall-clock time, time
+    waiting for a slot, Ollama's timing fields and why it failed, if it did.
+    AIPlayer records each decision with `decision`: where the card came from
+    (rules, cache, model, fallback...), how long it took, retries and the
+    last error. Turns are LLMClient's turn counter; the last `max_turns`
+    are kept.
+    """
+
+    def __init__(self, max_turns=50, recent=100):
+        self.started = time.time()
+        self.wall = {kind: Histogram() for kind in KINDS}
+        self.queued = Histogram()
+        self.load = Histogram()
+        self.prompt_eval = Histogram()
+        self.eval = Histogram()
+        self.tokens_per_second = Histogram()  # Generation speed per request
+        self.prompt_tokens = 0
+        self.eval_tokens = 0
+        self.eval_seconds = 0.0
+        self.requests = Counter()
+        self.failures = Counter()  # reason -> count
+        self.dropped = 0  # Dropped because the game moved on, not failures
+        self.cancelled = 0  # Abandoned by the caller, e.g. a prefetch that wasn't needed
+        self.decide = Histogram()
+        self.sources = Counter()
+        self.retries = 0
+        self.last_error = None
+        self.max_turns = max_turns
+        self.turns = OrderedDict()  # turn -> {"decision": s, "narrative": s, "background": s, "requests": n}
+        self.recent = deque(maxlen=recent)  # Raw records, newest last
+
+    def turn(self, number):
+        entry = self.turns.get(number)
+        if entry is None:
+            entry = self.turns[number] = {"decision": 0.0, "narrative": 0.0, "background": 0.0,
+                                          "requests": 0, "tokens": 0}
+            while len(self.turns) > self.max_turns:
+                self.turns.popitem(last=False)
+        return entry
+
+    def request(self, kind, turn, wall, queued=0.0, data=None, error=None, backend=None):
+        record = {"kind": kind, "turn": turn, "wall": wall, "queued": queued, "backend": backend, "error": error}
+        self.requests[kind] += 1
+        self.wall[kind].add(wall)
+        self.queued.add(queued)
+        entry = self.turn(turn)
+        entry["requests"] += 1
+        # Decision time per turn comes from decision(), which includes the retries
+        if kind in ("narrative", "intro"):
+            entry["narrative"] += wall
+        elif kind == "background":
+            entry["background"] += wall
+        if error == "dropped":
+            self.dropped += 1
+        elif error == "cancelled":
+            self.cancelled += 1
+        elif error:
+            self.failures[error] += 1
+        if isinstance(data, dict):
+            for field in OLLAMA_FIELDS:
+                if field in data:
+                    record[field] = data[field]
+            if "load_duration" in data:
+                self.load.add(data["load_duration"] / 1e9)
+            if "prompt_eval_duration" in data:
+                self.prompt_eval.add(data["prompt_eval_duration"] / 1e9)
+            self.prompt_tokens += data.get("prompt_eval_count", 0)
+            tokens = data.get("eval_count", 0)
+            self.eval_tokens += tokens
+            entry["tokens"] += tokens
+            if data.get("eval_duration"):
+                seconds = data["eval_duration"] / 1e9
+                self.eval.add(seconds)
+                self.eval_seconds += seconds
+                if tokens:
+                    self.tokens_per_second.add(tokens / seconds)
+        self.recent.append(record)
+
+    def decision(self, source, seconds, turn, retries=0, error=None):
+        self.sources[source] += 1
+        self.decide.add(seconds)
+        self.turn(turn)["decision"] += seconds
+        self.retries += retries
+        if error:
+            self.last_error = error
+        self.recent.append({"kind": "decide", "turn": turn, "source": source, "wall": seconds,
+                            "retries": retries, "error": error})
+
+    def snapshot(self):
+        return {
+            "uptime": time.time() - self.started,
+            "requests": dict(self.requests),
+            "failures": dict(self.failures),
+            "dropped": self.dropped,
+            "cancelled": self.cancelled,
+            "wall": {kind: histogram.summary() for kind, histogram in self.wall.items()},
+            "queued": self.queued.summary(),
+            "load": self.load.summary(),
+            "prompt_eval": self.prompt_eval.summary(),
+            "eval": self.eval.summary(),
+            "tokens_per_second": self.tokens_per_second.summary(),
+            "prompt_tokens": self.prompt_tokens,
+            "eval_tokens": self.eval_tokens,
+            "overall_tokens_per_second": self.eval_tokens / self.eval_seconds if self.eval_seconds else 0.0,
+            "decide": self.decide.summary(),
+            "sources": dict(self.sources),
+            "retries": self.retries,
+            "last_error": self.last_error,
+            "turns": {str(turn): entry for turn, entry in self.turns.items()},
+            "recent": list(self.recent),
+        }
+
+    def dump(self, path=None):
+        """Write snapshot() as JSON, by default to a new file in METRICS_DIR; returns the path"""
+        if path is None:
+            path = os.path.join(METRICS_DIR, time.strftime("metrics-%Y%m%d-%H%M%S.json"))
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=1)
+        return path
+
+    def lines(self, turns=5):
+        """A short text summary for the debug overlay"""
+        lines = [f"requests {sum(self.requests.values())}, failed {sum(self.failures.values())}, "
+                 f"dropped {self.dropped}, cancelled {self.cancelled}, queue p95 {self.queued.quantile(0.95):.2f}s"]
+        for kind in KINDS:
+            histogram = self.wall[kind]
+            if histogram.count:
+                lines.append(f"{kind:<10} n={histogram.count:<4} p50 {histogram.quantile(0.5):.2f}  "
+                             f"p95 {histogram.quantile(0.95):.2f}  p99 {histogram.quantile(0.99):.2f}s")
+        if self.eval_seconds:
+            lines.append(f"tokens: prompt {self.prompt_tokens}, generated {self.eval_tokens}, "
+                         f"{self.eval_tokens / self.eval_seconds:.0f} tok/s (p50 {self.tokens_per_second.quantile(0.5):.0f}), "
+                         f"load p95 {self.load.quantile(0.95):.2f}s")
+        if self.sources:
+            sources = ", ".join(f"{source} {count}" for source, count in self.sources.most_common())
+            lines.append(f"decisions: {sources}; p95 {self.decide.quantile(0.95):.2f}s, retries {self.retries}")
+        if self.last_error:
+            lines.append(f"last error: {self.last_error}")
+        for reason, count in self.failures.most_common(3):
+            lines.append(f"failed x{count}: {reason}")
+        for turn, entry in list(self.turns.items())[-turns:]:
+            lines.append(f"turn {turn}: decision {entry['decision']:.2f}s, narrative {entry['narrative']:.2f}s, "
+                         f"background {entry['background']:.2f}s, {entry['requests']} requests, {entry['tokens']} tokens")
+        return lines
@@ -0,0 +1,108 @@
+# narratives.py
+import asyncio
+import json
+import os
+import random
+from card import REGISTRY
+from llm_client import BACKGROUND, DECISION
+
+NARRATIVES_FILE = os.path.join(os.path.expanduser("~"), ".cache", "genmaczek", "narratives.json")
+ACTIONS = {
+    # actor -> (how the action is described to the model)
+    "Player": "● Player used {card} against AI.",
+    "AI": "▶ AI used {card} against Player.",
+}
+
+
+def usable(text):
+    """False for the fallback line and for answers with nothing after the bullet"""
+    return bool(text and text.strip("●▶ ")) and text != "▶ The battle continues..."
+
+
+class NarrativePool:
+    """A few ready-made narratives for every (actor, card), kept on disk.
+
+    `get` answers at once with a random stored variant (or the plain action
+    line until one exists). `refill` is a background task that asks the model
+    for missing variants while it has nothing else to do, and once every slot
+    is full keeps replacing old ones so the text doesn't get stale.
+    """
+
+    def __init__(self, path=NARRATIVES_FILE, variants=4, rng=None):
+        self.path = path
+        self.variants = variants
+        self.rng = rng or random.Random()
+        self.pool = {}  # "actor|card" -> [narrative, ...]
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.pool = {key: list(texts) for key, texts in json.load(f).items()}
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    @staticmethod
+    def action(actor, card_name):
+        return ACTIONS[actor].format(card=card_name)
+
+    def has(self, actor, card_name):
+        return bool(self.pool.get(f"{actor}|{card_name}"))
+
+    def get(self, actor, card_name):
+        texts = self.pool.get(f"{actor}|{card_name}")
+        if texts:
+            return self.rng.choice(texts)
+        return self.action(actor, card_name)
+
+    def add(self, actor, card_name, text):
+        """False if the text was already there"""
+        texts = self.pool.setdefault(f"{actor}|{card_name}", [])
+        if text in texts:
+            return False
+        if len(texts) >= self.variants:
+            texts.pop(0)  # Oldest goes
+        texts.append(text)
+        return True
+
+    def missing(self):
+        """(actor, card name) slots that still need variants, emptiest first"""
+        slots = [(actor, card.name) for actor in ACTIONS for card in REGISTRY if card.effect != "skip"]
+        slots = [slot for slot in slots if len(self.pool.get("|".join(slot), ())) < self.variants]
+        slots.sort(key=lambda slot: len(self.pool.get("|".join(slot), ())))
+        return slots
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"  # Two games at once mustn't share it
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.pool, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Could not save narratives: {e}")
+
+    async def refill(self, narrative_ai, idle=None, pause=2.0, rotate_every=30.0):
+        """Run forever: generate narratives whenever `idle()` says the model is free.
+
+        By default that is while no decision is asked or waiting for a slot,
+        so prefetched decisions don't queue behind the refill.
+        """
+        if idle is None:
+            idle = lambda: not narrative_ai.client.busy(DECISION)
+        while True:
+            if not idle():
+                await asyncio.sleep(pause)
+                continue
+            slots = self.missing()
+            if slots:
+                actor, card_name = slots[0]
+            else:
+                await asyncio.sleep(rotate_every)
+                if not idle():
+                    continue
+                actor = self.rng.choice(list(ACTIONS))
+                card_name = self.rng.choice([card.name for card in REGISTRY if card.effect != "skip"])
+
+            text = await narrative_ai.generate_narrative(self.action(actor, card_name), priority=BACKGROUND)
+            if usable(text) and self.add(actor, card_name, text):
+                self.save()
+            else:
+                await asyncio.sleep(pause)  # Server down, bad or repeated answer, try again later
@@ -0,0 +1,36 @@
+# pipeline.py
+import asyncio
+
+
+class TurnPipeline:
+    """Work that runs next to a turn instead of holding it up.
+
+    Game moves are still applied one at a time by the caller, in rule order.
+    Whatever doesn't change the game (narratives) is started here and runs
+    alongside the AI's decision. Each narrative writes into the paragraph
+    reserved when its action happened, so the log stays in game order
+    whichever one finishes first.
+    """
+
+    def __init__(self):
+        self.tasks = set()
+
+    def spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self._finished)
+        return task
+
+    def _finished(self, task):
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Background task failed: {task.exception()!r}")
+
+    async def drain(self):
+        """Wait for everything started so far"""
+        while self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    def cancel(self):
+        for task in list(self.tasks):
+            task.cancel()
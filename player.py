@@ -1,5 +1,6 @@
 import random
-from card import Card  # Add this import
+from card import REGISTRY, Card  # Add this import
+from zobrist import HAND_KEYS, MASK
 
 class Player:
     def __init__(self, name):
@@ -9,6 +10,7 @@ class Player:
         self.defense = 0
         self.skip_card = Card.create_skip_card()
         self.hand = [self.skip_card]  # Start with skip card
+        self.zobrist = HAND_KEYS[self.skip_card.card_id]  # Hash of the hand, see zobrist.py
         self._resources = 10  # Using private variable for resources
         self.skip_next_turn = False
 
@@ -24,9 +26,9 @@ class Player:
         """Draw cards from the deck"""
         cards_to_draw = min(num, len(deck))
         for _ in range(cards_to_draw):
-            if deck:  # Check if deck is not empty
-                card = deck.pop()  # Remove card from deck
-                self.hand.append(card)
+            card = deck.pop()  # Random card from the deck
+            self.hand.append(card)
+            self.zobrist = (self.zobrist + HAND_KEYS[card.card_id]) & MASK
 
     def can_play_card(self, card):
         return self.resources >= card.cost
@@ -50,21 +52,18 @@ class Player:
             # Add defense points
             self.defense += card.defense
             
-            # Apply card effects
-            if card.effect:
-                card.apply_effect(self, opponent)
+            # Apply card effects, prebuilt in the registry's table by card id
+            effect = REGISTRY.effects[card.card_id] if card.card_id is not None else card.effect_fn
+            if effect is not None:
+                effect(self, opponent)
             
             self.hand.remove(card)
-            if card != self.skip_card:
-                pass
+            self.zobrist = (self.zobrist - HAND_KEYS[card.card_id]) & MASK
 
     def end_turn(self, deck):
         """Return unused cards to the deck"""
-        # Keep skip card if present
-        skip_cards = [card for card in self.hand if card.effect == "skip"]
-        # Get other cards
-        other_cards = [card for card in self.hand if card.effect != "skip"]
-        # Return other cards to deck
-        deck.extend(other_cards)
-        # Reset hand to only have skip cards
-        self.hand = skip_cards
+        # Return everything but the skip card to the deck
+        deck.extend(card for card in self.hand if card is not self.skip_card)
+        # Reset hand to only have the skip card
+        self.hand = [self.skip_card]
+        self.zobrist = HAND_KEYS[self.skip_card.card_id]
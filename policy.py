@@ -0,0 +1,203 @@
+# policy.py
+# A small NumPy model distilled from the model's logged decisions (decision_cache.DecisionLog)
+import argparse
+import os
+import numpy as np
+from card import REGISTRY, SKIP_CARD
+from decision_cache import LOG_FILE, decision_state, read_log
+
+POLICY_FILE = os.path.join(os.path.expanduser("~"), ".cache", "genmaczek", "policy.npz")
+SCALE = np.array([100.0, 20.0, 100.0, 50.0, 100.0])  # decision_state numbers to about [0, 1]
+SKIP = SKIP_CARD.card_id
+
+
+def encode(rows, n_cards=None):
+    """(features, option masks, chosen ids) for log rows.
+
+    The features are what the prompt shows: the state numbers and which
+    cards are on offer. Skipping is always an option, like in the answer schema.
+    """
+    n_cards = n_cards or len(REGISTRY)
+    n = len(rows)
+    states = np.array([row["s"] for row in rows], dtype=np.float64).reshape(n, len(SCALE))
+    masks = np.zeros((n, n_cards), dtype=bool)
+    for i, row in enumerate(rows):
+        masks[i, row["o"]] = True
+    masks[:, SKIP] = True
+    x = np.hstack([states / SCALE, masks])
+    y = np.array([row.get("c", SKIP) for row in rows], dtype=np.int64)
+    return x, masks, y
+
+
+class Policy:
+    """Softmax over the cards on offer, with an optional ReLU hidden layer.
+
+    `layers` is a list of (weights, bias); one layer is plain (multinomial)
+    logistic regression.
+    """
+
+    def __init__(self, layers, names):
+        self.layers = layers
+        self.names = list(names)  # Card names by id when it was trained
+
+    def logits(self, x):
+        for i, (w, b) in enumerate(self.layers):
+            x = x @ w + b
+            if i < len(self.layers) - 1:
+                x = np.maximum(x, 0.0)
+        return x
+
+    def probabilities(self, x, masks):
+        z = np.where(masks, self.logits(x), -np.inf)
+        z = np.exp(z - z.max(axis=1, keepdims=True))
+        return z / z.sum(axis=1, keepdims=True)
+
+    def choose(self, game_state, candidates):
+        """(card, probability) for a decision, the same contract as the model's pick"""
+        # One row without encode(), this runs every turn
+        ids = sorted({SKIP} | {card.card_id for card in candidates})
+        x = np.zeros(len(SCALE) + len(self.names))
+        x[:len(SCALE)] = decision_state(game_state)
+        x[:len(SCALE)] /= SCALE
+        x[[len(SCALE) + card_id for card_id in ids]] = 1.0
+        z = self.logits(x)[ids]
+        best = int(z.argmax())
+        p = np.exp(z - z[best])
+        return REGISTRY[ids[best]], float(1.0 / p.sum())
+
+    def save(self, path=POLICY_FILE):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        arrays = {f"{kind}{i}": a for i, layer in enumerate(self.layers) for kind, a in zip("wb", layer)}
+        np.savez(path, names=np.array(self.names), **arrays)
+
+    @classmethod
+    def load(cls, path=POLICY_FILE):
+        """The saved policy, None if there is none or the cards have changed since"""
+        try:
+            with np.load(path) as data:
+                names = [str(name) for name in data["names"]]
+                layers = [(data[f"w{i}"], data[f"b{i}"]) for i in range(len(data.files) // 2)]
+        except (OSError, KeyError, ValueError):
+            return None
+        if names != [card.name for card in REGISTRY]:
+            print("Policy was trained on other cards, retrain it")
+            return None
+        return cls(layers, names)
+
+
+def train(rows, hidden=16, epochs=400, rate=0.05, l2=1e-4, seed=0):
+    """Fit a Policy to log rows with full-batch Adam on the cross-entropy; hidden=0 for logistic regression"""
+    x, masks, y = encode(rows)
+    rng = np.random.default_rng(seed)
+    sizes = [x.shape[1]] + ([hidden] if hidden else []) + [masks.shape[1]]
+    layers = [(rng.normal(0, np.sqrt(2.0 / n_in), (n_in, n_out)), np.zeros(n_out))
+              for n_in, n_out in zip(sizes, sizes[1:])]
+    params = [a for layer in layers for a in layer]
+    moments = [(np.zeros_like(a), np.zeros_like(a)) for a in params]
+    target = np.zeros_like(masks, dtype=np.float64)
+    target[np.arange(len(y)), y] = 1.0
+
+    for step in range(1, epochs + 1):
+        # Forward, keeping every layer's input
+        inputs = [x]
+        for i, (w, b) in enumerate(layers):
+            out = inputs[-1] @ w + b
+            inputs.append(np.maximum(out, 0.0) if i < len(layers) - 1 else out)
+        z = np.where(masks, inputs[-1], -np.inf)
+        p = np.exp(z - z.max(axis=1, keepdims=True))
+        p /= p.sum(axis=1, keepdims=True)
+
+        # Backward
+        grad = (p - target) / len(y)
+        grads = []
+        for i in reversed(range(len(layers))):
+            w, b = layers[i]
+            grads.append((inputs[i].T @ grad + l2 * w, grad.sum(axis=0)))
+            if i:
+                grad = (grad @ w.T) * (inputs[i] > 0)
+        grads = [g for layer in reversed(grads) for g in layer]
+
+        for a, g, (m, v) in zip(params, grads, moments):
+            m *= 0.9
+            m += 0.1 * g
+            v *= 0.999
+            v += 0.001 * g * g
+            a -= rate * (m / (1 - 0.9 ** step)) / (np.sqrt(v / (1 - 0.999 ** step)) + 1e-8)
+
+    return Policy(layers, [card.name for card in REGISTRY])
+
+
+def split(rows, holdout=0.2):
+    """(train, held out) rows: the newest `holdout` share is held out.
+
+    The log only grows, so a saved policy never trained on what a later
+    report holds out.
+    """
+    cut = int(len(rows) * (1 - holdout))
+    return rows[:cut], rows[cut:]
+
+
+def agreement(policy, rows, train_rows=(), thresholds=(0.5, 0.7, 0.9)):
+    """How often the policy picks what the model picked on `rows`.
+
+    The baseline picks the card the model chose most often in `train_rows`
+    among those on offer. For each confidence threshold: the share of
+    decisions the policy would take over and its agreement on those.
+    """
+    x, masks, y = encode(rows)
+    p = policy.probabilities(x, masks)
+    picks = p.argmax(axis=1)
+    confidence = p.max(axis=1)
+    counts = np.bincount([row["c"] for row in train_rows], minlength=masks.shape[1])
+    baseline = np.where(masks, counts + 1e-9 * np.arange(masks.shape[1]), -1).argmax(axis=1)
+    report = {
+        "decisions": len(y),
+        "agreement": float((picks == y).mean()) if len(y) else 0.0,
+        "baseline": float((baseline == y).mean()) if len(y) else 0.0,
+        "by_card": {},
+        "by_confidence": {},
+    }
+    for card_id in np.unique(y):
+        chosen = y == card_id
+        report["by_card"][REGISTRY[int(card_id)].name] = (int(chosen.sum()), float((picks[chosen] == card_id).mean()))
+    for threshold in thresholds:
+        sure = confidence >= threshold
+        report["by_confidence"][threshold] = (float(sure.mean()) if len(y) else 0.0,
+                                              float((picks[sure] == y[sure]).mean()) if sure.any() else 0.0)
+    return report
+
+
+def print_report(report):
+    print(f"{report['decisions']} held-out decisions: policy agrees {report['agreement']:.1%}, "
+          f"most-common-card baseline {report['baseline']:.1%}")
+    for name, (count, agreed) in sorted(report["by_card"].items(), key=lambda item: -item[1][0]):
+        print(f"  {name:<24} {count:>5}  {agreed:.1%}")
+    for threshold, (coverage, agreed) in report["by_confidence"].items():
+        print(f"  confidence >= {threshold}: takes {coverage:.1%} of decisions, agrees on {agreed:.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the distilled policy on logged model decisions")
+    parser.add_argument("--log", default=LOG_FILE)
+    parser.add_argument("--out", default=POLICY_FILE)
+    parser.add_argument("--version", help="Only use decisions of this model version")
+    parser.add_argument("--hidden", type=int, default=16, help="Hidden units, 0 for logistic regression")
+    parser.add_argument("--epochs", type=int, default=400)
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--report", action="store_true", help="Only report on the saved policy")
+    args = parser.parse_args()
+
+    rows = read_log(args.log, args.version)
+    if not rows:
+        raise SystemExit(f"No decisions in {args.log}, play a few games first")
+    train_rows, test_rows = split(rows, args.holdout)
+    if args.report:
+        policy = Policy.load(args.out)
+        if policy is None:
+            raise SystemExit(f"No policy at {args.out}")
+    else:
+        policy = train(train_rows, args.hidden, args.epochs)
+    print_report(agreement(policy, test_rows, train_rows))
+    if not args.report:
+        policy.save(args.out)
+        print(f"Saved to {args.out}")
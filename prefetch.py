@@ -0,0 +1,73 @@
+# prefetch.py
+import asyncio
+from ai_player import ai_game_state
+
+
+class MovePrefetcher:
+    """Works out the AI's answer to every card the player could play, while they choose.
+
+    `start` is called when the hand is shown. Each legal card gets a task
+    that plays it on a copy of the game and asks the AI for its reply; at
+    most `max_concurrent` of them run at once so the model server (or the
+    search pool) isn't flooded. `choose` keeps the task for the clicked card
+    and cancels the others, `reply` hands its move over if the real game
+    reached the same position.
+    """
+
+    def __init__(self, max_concurrent=2):
+        self.max_concurrent = max_concurrent
+        self.semaphore = None
+        self.tasks = {}  # player card id -> task
+        self.chosen = None
+        self.hits = 0
+        self.misses = 0
+
+    def start(self, engine):
+        self.cancel()
+        if engine.to_move is not engine.player:
+            return
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_concurrent)
+        for card in engine.legal_moves():
+            if card.card_id not in self.tasks:
+                self.tasks[card.card_id] = asyncio.ensure_future(self._reply(engine.clone(), card))
+
+    async def _reply(self, state, card):
+        async with self.semaphore:
+            speculate = getattr(state.ai_player, 'speculate', None)
+            if speculate is not None:
+                speculate()  # Its stats and log lines only count if the move gets used
+            state.play(card)
+            if state.to_move is not state.ai_player:
+                return None  # Game over, or the AI is stunned
+            key = state.state_key()
+            move = await state.ai_player.decide_move(ai_game_state(state))
+            return key, move, state.ai_player
+
+    def choose(self, card):
+        self.chosen = self.tasks.pop(card.card_id, None)
+        self.cancel()
+
+    async def reply(self, engine):
+        """The prefetched AI move for the current position, or None"""
+        task, self.chosen = self.chosen, None
+        if task is None:
+            return None
+        try:
+            result = await task
+        except Exception as e:
+            print(f"Prefetched move failed: {e}")
+            result = None
+        if result is None or result[0] != engine.state_key():
+            self.misses += 1
+            return None
+        self.hits += 1
+        adopt = getattr(engine.ai_player, 'adopt', None)
+        if adopt is not None:
+            adopt(result[2])  # e.g. the chat turn the copy had with the model, its stats
+        return result[1]
+
+    def cancel(self):
+        for task in self.tasks.values():
+            task.cancel()
+        self.tasks.clear()
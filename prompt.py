@@ -0,0 +1,69 @@
+# prompt.py
+# Compact prompts for move decisions: fixed field order, cards by short id
+import re
+from functools import lru_cache
+from card import REGISTRY
+
+STATE_TEMPLATE = "you hp{hp} res{res} | foe hp{foe_hp} def{foe_def} | deck{deck}"
+CHOICE_TEMPLATE = "options: {options}"
+ANSWER = 'Answer {"card_name": "<card name>"}.'
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+
+def card_code(card):
+    return f"C{card.card_id}"
+
+
+@lru_cache(maxsize=None)
+def card_line(card_id):
+    """One legend line, e.g. 'C1 Laser Attack: atk15 cost2'"""
+    card = REGISTRY[card_id]
+    if card.effect == "skip":
+        return f"{card_code(card)} skip_turn: pass, +1 res"  # The name the answer schema uses
+    stats = []
+    if card.attack:
+        stats.append(f"atk{card.attack}" + (" pierce" if card.piercing else ""))
+    if card.defense:
+        stats.append(f"def{card.defense}")
+    if card.effect:
+        stats.append(" ".join([card.effect] + [f"{name}{value}" for name, value in card.effect_params.items()]))
+    stats.append(f"cost{card.cost}")
+    return f"{card_code(card)} {card.name}: {' '.join(stats)}"
+
+
+@lru_cache(maxsize=1024)
+def legend(card_ids):
+    return "\n".join(card_line(card_id) for card_id in card_ids)
+
+
+def count_tokens(text):
+    """Rough token count (words and punctuation), close enough to budget with"""
+    return len(_TOKEN.findall(text))
+
+
+def encode_state(game_state):
+    return STATE_TEMPLATE.format(hp=game_state['ai_health'], res=game_state['ai_resources'],
+                                 foe_hp=game_state['player_health'], foe_def=game_state.get('player_defense', 0),
+                                 deck=len(game_state['deck']))
+
+
+def encode_prompt(game_state, cards, last_error=None, with_legend=True, max_tokens=None):
+    """(prompt, token count) for choosing one of `cards`.
+
+    Over `max_tokens` the legend is left out first (the names are still
+    there); the state and the options always go in.
+    """
+    ids = tuple(sorted({card.card_id for card in cards}))
+    options = CHOICE_TEMPLATE.format(options=", ".join(f"C{card_id}" for card_id in ids))
+    parts = [encode_state(game_state), legend(ids) if with_legend else "", options]
+    if last_error:
+        parts.append(f"last answer rejected: {last_error}")
+    parts.append(ANSWER)
+    prompt = "\n".join(part for part in parts if part)
+    tokens = count_tokens(prompt)
+    if max_tokens is not None and tokens > max_tokens and with_legend:
+        names = ", ".join(f"C{card_id}={REGISTRY[card_id].name}" for card_id in ids)
+        parts[1] = names
+        prompt = "\n".join(part for part in parts if part)
+        tokens = count_tokens(prompt)
+    return prompt, tokens
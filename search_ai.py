@@ -0,0 +1,251 @@
+# search_ai.py
+import asyncio
+import math
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from card import REGISTRY
+from endgame import ENDGAME_THRESHOLD, EndgameSolver
+from engine import reward
+from player import Player
+from zobrist import TranspositionTable
+
+
+class _Node:
+    __slots__ = ("visits", "value", "children")
+
+    def __init__(self):
+        self.visits = 0
+        self.value = 0.0  # Summed reward for the side that made the move into this node
+        self.children = {}  # card id -> _Node
+
+
+def _determinize(state, viewer, rng):
+    """Hide the other side's hand: put it back and draw the same number at random"""
+    hidden = state.opponent_of(viewer)
+    count = sum(card is not hidden.skip_card for card in hidden.hand)
+    hidden.end_turn(state.deck)
+    hidden.draw_cards(state.deck, count)
+
+
+def _rollout(state, rng, max_turns):
+    # Random play for a few turns, then judge by health
+    stop = state.turn + max_turns
+    while state.to_move is not None and state.turn < stop:
+        state.play(rng.choice(state.legal_moves()))
+
+
+def mcts(engine, budget_ms=50, seed=None, rollout_turns=6, exploration=1.4, min_iterations=32,
+         table=None, reuse_after=4):
+    """Search from `engine`'s side to move; returns {card id: visits} at the root
+
+    Open-loop UCT: every iteration works on a fresh copy of the game with the
+    opponent's hand and the deck order re-randomised, so the tree is keyed by
+    the cards played rather than by exact states.
+
+    `table` (a TranspositionTable) keeps the playout results per position
+    key; once a position has `reuse_after` playouts its mean is used instead
+    of playing it out again. It can be kept across moves.
+    """
+    rng = random.Random(seed)
+    viewer_is_ai = engine.to_move is engine.ai_player
+    root = _Node()
+    deadline = time.perf_counter() + budget_ms / 1000
+    iterations = 0
+
+    while iterations < min_iterations or time.perf_counter() < deadline:
+        iterations += 1
+        state = engine.clone(rng=rng)
+        viewer = state.ai_player if viewer_is_ai else state.player
+        _determinize(state, viewer, rng)
+
+        node = root
+        path = []  # (node, actor who moved into it)
+        while state.to_move is not None:
+            actor = state.to_move
+            moves = {card.card_id: card for card in state.legal_moves()}
+            unexplored = [card_id for card_id in moves if card_id not in node.children]
+            if unexplored:
+                card_id = rng.choice(unexplored)
+                child = node.children[card_id] = _Node()
+                path.append((child, actor))
+                state.play(moves[card_id])
+                break
+
+            # UCB1 over the moves legal in this determinisation
+            log_n = math.log(node.visits or 1)
+            card_id = max(moves, key=lambda m: node.children[m].value / node.children[m].visits
+                          + exploration * math.sqrt(log_n / node.children[m].visits))
+            node = node.children[card_id]
+            path.append((node, actor))
+            state.play(moves[card_id])
+
+        # Result from the human player's side; the reward is zero-sum
+        if state.to_move is None:
+            result = reward(state, state.player)
+        else:
+            key = state.state_key() if table is not None else None
+            entry = table.get(key) if table is not None else None
+            if entry is not None and entry[0] >= reuse_after:
+                result = entry[1] / entry[0]
+            else:
+                _rollout(state, rng, rollout_turns)
+                result = reward(state, state.player)
+                if entry is not None:
+                    entry[0] += 1
+                    entry[1] += result
+                elif table is not None:
+                    table.put(key, [1, result])
+
+        root.visits += 1
+        for node, actor in path:
+            node.visits += 1
+            node.value += result if actor is state.player else 1 - result
+
+    return {card_id: child.visits for card_id, child in root.children.items()}
+
+
+_worker_table = None
+
+
+def _worker_mcts(engine, budget_ms, seed):
+    # Each pool process keeps its own table between moves
+    global _worker_table
+    if _worker_table is None:
+        _worker_table = TranspositionTable()
+    return mcts(engine, budget_ms, seed, table=_worker_table)
+
+
+def _warm_worker():
+    # Importing this module and making the table is the slow part of a cold worker
+    global _worker_table
+    if _worker_table is None:
+        _worker_table = TranspositionTable()
+    return os.getpid()
+
+
+def merge_visits(results):
+    """Root-parallel search: add up the root visit counts of independent trees"""
+    merged = {}
+    for visits in results:
+        for card_id, count in visits.items():
+            merged[card_id] = merged.get(card_id, 0) + count
+    return merged
+
+
+def best_card(visits):
+    card_id = max(visits, key=visits.get)
+    return REGISTRY[card_id]
+
+
+class SearchAIPlayer(Player):
+    """Local opponent: Monte Carlo Tree Search over the headless engine.
+
+    Same `decide_move(game_state)` contract as AIPlayer, but needs the
+    running GameEngine in `game_state['engine']` and no model server.
+
+    The search runs in a process pool so the UI loop never blocks. Each
+    worker grows its own tree from its own seed for the whole budget and the
+    root visit counts are merged, so more cores mean more playouts in the
+    same wall-clock time. Worker processes start on the first move; `workers=0`
+    searches inline instead (headless simulations).
+    """
+
+    def __init__(self, name, budget_ms=50, seed=None, workers=None):
+        super().__init__(name)
+        self.budget_ms = budget_ms
+        self.rng = random.Random(seed)
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self._pool = self.new_pool() if self.workers > 0 else None
+        self.table = TranspositionTable()  # For inline search, workers have their own
+        self.endgame_threshold = ENDGAME_THRESHOLD
+        self.held = None  # Log lines of a speculative copy, see speculate()
+
+    def __copy__(self):
+        # Engine clones share the pool and table, like AIPlayer clones share the session
+        other = object.__new__(type(self))
+        other.__dict__.update(self.__dict__)
+        return other
+
+    def __getstate__(self):
+        # Engine clones and worker snapshots don't take the pool or table along
+        state = self.__dict__.copy()
+        state['_pool'] = None
+        state['table'] = None
+        return state
+
+    def new_pool(self):
+        # Spawned workers, forking a running Qt app is not safe. Processes
+        # only start with the first search.
+        context = multiprocessing.get_context("spawn")
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+
+    def get_pool(self):
+        if self._pool is None:
+            self._pool = self.new_pool()
+        return self._pool
+
+    async def decide_move(self, game_state):
+        engine = game_state.get('engine')
+        if engine is None or engine.to_move is not self:
+            print("Search AI needs the engine on its own move, skipping")
+            return self.skip_card
+
+        moves = engine.legal_moves(self)
+        if len({card.card_id for card in moves}) == 1:
+            return moves[0]
+
+        if len(engine.deck) <= self.endgame_threshold:
+            card, value = EndgameSolver().best_move(engine)
+            self.report(f"AI playing {card.name} (endgame, {value:.2f})")
+            return card
+
+        if self.workers > 0:
+            # Awaited on the running loop, the UI keeps going while workers search
+            pool = self.get_pool()
+            searches = [pool.submit(_worker_mcts, engine, self.budget_ms, self.rng.random())
+                        for _ in range(self.workers)]
+            try:
+                visits = merge_visits(await asyncio.gather(*map(asyncio.wrap_future, searches)))
+            except asyncio.CancelledError:
+                # e.g. a prefetch that wasn't needed: searches still queued never start
+                for search in searches:
+                    search.cancel()
+                raise
+        else:
+            visits = mcts(engine, self.budget_ms, seed=self.rng.random(), table=self.table)
+        card = best_card(visits)
+        self.report(f"AI playing {card.name} (search)")
+        return card
+
+    def report(self, line):
+        if self.held is not None:
+            self.held.append(line)
+        else:
+            print(line)
+
+    def speculate(self):
+        """Make this engine copy hold back its log lines until `adopt` uses its move (see prefetch.py)"""
+        self.held = []
+
+    def adopt(self, other):
+        for line in other.held or ():
+            print(line)
+
+    async def warm_up(self):
+        """Start the worker processes now instead of on the first move, returns the seconds it took"""
+        started = time.perf_counter()
+        if self.workers > 0:
+            loop = asyncio.get_running_loop()
+            pool = self.get_pool()
+            await asyncio.gather(*[loop.run_in_executor(pool, _warm_worker) for _ in range(self.workers)])
+        seconds = time.perf_counter() - started
+        print(f"Search workers ready in {seconds:.1f}s")
+        return seconds
+
+    async def cleanup(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,102 @@
+# stub_server.py
+# Stand-in for an Ollama server, to try the game and the backend router without models:
+#   python3 stub_server.py --port 11500 --delay 0.05
+import argparse
+import asyncio
+import json
+import random
+from aiohttp import web
+
+NARRATIVES = [
+    "Sparks fly as the blow lands on the hull.",
+    "The fleet shudders, but holds its line.",
+    "Alarms wail across the bridge as the attack hits home.",
+]
+
+
+def answer(body):
+    """Canned JSON text for a request: a card from the schema enum, or a narrative"""
+    schema = body.get("format")
+    if isinstance(schema, dict):
+        options = schema.get("properties", {}).get("card_name", {}).get("enum") or ["skip_turn"]
+        return json.dumps({"card_name": random.choice(options)})
+    return json.dumps({"narrative_commentary": random.choice(NARRATIVES)})
+
+
+class StubServer:
+    def __init__(self, name, delay=0.05, fail_rate=0.0):
+        self.name = name
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self.requests = 0
+
+    def stats(self, body, text):
+        tokens = len(text) // 4 + 1
+        return {
+            "model": body.get("model", ""),
+            "done": True,
+            "total_duration": int(self.delay * 1e9),
+            "load_duration": 0,
+            "prompt_eval_count": len(json.dumps(body)) // 4,
+            "prompt_eval_duration": int(self.delay * 0.2e9),
+            "eval_count": tokens,
+            "eval_duration": int(self.delay * 0.8e9),
+        }
+
+    async def reply(self, request, chat):
+        self.requests += 1
+        body = await request.json()
+        if random.random() < self.fail_rate:
+            return web.Response(status=503, text="stub failure")
+        if not body.get("prompt") and not body.get("messages"):
+            return web.json_response({"model": body.get("model", ""), "response": "", "done": True})  # Load only
+
+        text = answer(body)
+        if not body.get("stream", True):
+            await asyncio.sleep(self.delay)
+            result = {"message": {"role": "assistant", "content": text}} if chat else {"response": text}
+            return web.json_response({**result, **self.stats(body, text)})
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        pieces = [text[i:i + 4] for i in range(0, len(text), 4)]
+        for piece in pieces:
+            await asyncio.sleep(self.delay / len(pieces))
+            chunk = {"message": {"role": "assistant", "content": piece}} if chat else {"response": piece}
+            await response.write((json.dumps({**chunk, "done": False}) + "\n").encode())
+        final = {"message": {"role": "assistant", "content": ""}} if chat else {"response": ""}
+        await response.write((json.dumps({**final, **self.stats(body, text)}) + "\n").encode())
+        return response
+
+    async def ping(self, request):
+        return web.Response(text=f"Ollama is running ({self.name})")
+
+    async def generate(self, request):
+        return await self.reply(request, chat=False)
+
+    async def chat(self, request):
+        return await self.reply(request, chat=True)
+
+    async def counts(self, request):
+        return web.json_response({"requests": self.requests})
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/", self.ping)
+        app.router.add_post("/api/generate", self.generate)
+        app.router.add_post("/api/chat", self.chat)
+        app.router.add_get("/stats", self.counts)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama server for testing")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--delay", type=float, default=0.05, help="seconds per generation")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered with 503")
+    args = parser.parse_args()
+    web.run_app(StubServer(f"port {args.port}", args.delay, args.fail_rate).app(), port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+# conftest.py
+# The game modules live in the repository root; Qt draws offscreen
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
@@ -0,0 +1,124 @@
+# test_ai_player.py
+import asyncio
+import time
+from card import REGISTRY
+import stub_server
+from ai_player import AIPlayer, move_schema
+from decision_cache import DecisionCache, DecisionLog
+from prompt import count_tokens
+from stub_server import StubServer
+from test_llm_client import serving
+
+LASER, SHIELD, ROCKET, REPAIR = (REGISTRY.by_name(name) for name in
+                                 ("Laser Attack", "Shield Upgrade", "Rocket Attack", "Repair"))
+
+
+def ai_player(url="http://127.0.0.1:9", **options):
+    """An AIPlayer that keeps its cache and log in memory"""
+    return AIPlayer("AI Opponent", url, decisions=DecisionCache(None), decision_log=DecisionLog(None), **options)
+
+
+def game_state(player_health=100, deck_size=40):
+    return {'player_health': player_health, 'player_defense': 0, 'ai_health': 100, 'ai_resources': 10,
+            'deck': [LASER] * deck_size}
+
+
+def test_clear_choice_needs_no_model():
+    ai = ai_player()  # Nothing listens there
+    ai.hand = [ai.skip_card, SHIELD, ROCKET]
+    card, source = asyncio.run(ai.choose_move(game_state(player_health=20)))
+    assert (card, source) == (ROCKET, "rules")
+    assert not ai.client.metrics.requests
+
+
+def test_slow_model_falls_back_to_the_rules_in_time():
+    async def run():
+        async with serving(StubServer("slow", delay=1.0)) as (url,):
+            ai = ai_player(url, tiebreak_margin=1000, min_budget=0.2, max_budget=0.2)
+            ai.hand = [ai.skip_card, SHIELD, LASER]
+            attempt = {}
+            started = time.perf_counter()
+            card, source = await ai.choose_move(game_state(), attempt=attempt)
+            elapsed = time.perf_counter() - started
+            await ai.client.close()
+        assert (card, source) == (LASER, "fallback")  # The rules' pick
+        assert elapsed < 0.5
+        assert attempt['error'] == "Missed the decision budget"
+        assert ai.client.metrics.failures["missed deadline"] == 1
+
+    asyncio.run(run())
+
+
+def test_model_answer_in_time_is_played_and_cached():
+    async def run():
+        async with serving(StubServer("fast", delay=0.01)) as (url,):
+            ai = ai_player(url, tiebreak_margin=1000)
+            ai.hand = [ai.skip_card, SHIELD, LASER]
+            first = await ai.choose_move(game_state())
+            second = await ai.choose_move(game_state())
+            await ai.client.close()
+        assert first[1] == "model" and first[0] in (ai.skip_card, SHIELD, LASER)
+        assert second == (first[0], "cached")
+
+    asyncio.run(run())
+
+
+def test_schema_offers_only_the_candidates_and_skipping():
+    skip = REGISTRY[0]
+    schema = move_schema([LASER, skip, SHIELD, LASER])
+    assert schema["properties"]["card_name"]["enum"] == ["Laser Attack", "Shield Upgrade", "skip_turn"]
+    assert schema["required"] == ["card_name"]
+
+
+def test_card_outside_the_options_is_asked_again(monkeypatch):
+    answers = iter(['{"card_name": "Rocket Attack"}', '{"card_name": " laser attack"}'])
+    monkeypatch.setattr(stub_server, "answer", lambda body: next(answers))
+
+    async def run():
+        async with serving(StubServer("stub", delay=0.01)) as (url,):
+            ai = ai_player(url)
+            attempt = {}
+            situation = ([SHIELD, LASER], 10, 100, 100, 40)
+            card = await ai.ask_model(game_state(), [SHIELD, LASER], situation, attempt=attempt)
+            await ai.client.close()
+        assert card is LASER
+        assert attempt == {'retries': 1, 'error': "Card Rocket Attack is not one of the options"}
+
+    asyncio.run(run())
+
+
+def chat_state(player_health=100):
+    return dict(game_state(player_health), ai_hand=[LASER.to_dict(), SHIELD.to_dict()])
+
+
+def test_chat_sends_the_cards_once_then_only_changes():
+    ai = ai_player(chat=True, max_prompt_tokens=None)
+    first = ai.create_chat_message(chat_state())
+    assert "Rocket Attack" in first  # Every card, for the rest of the match
+    ai.remember({"role": "user", "content": first}, '{"card_name": "Laser Attack"}', chat_state())
+    second = ai.create_chat_message(chat_state(player_health=85))
+    assert second.startswith("changed: opponent health 85 (was 100)\noptions: C1, C2\n")
+    assert "Shield Upgrade" not in second
+
+
+def test_chat_names_the_cards_when_the_legend_is_over_budget():
+    ai = ai_player(chat=True, max_prompt_tokens=40)
+    ai.remember({"role": "user", "content": ai.create_chat_message(chat_state())}, "{}", chat_state())
+    assert not ai.chat_legend
+    assert "options: C1=Laser Attack, C2=Shield Upgrade" in ai.create_chat_message(chat_state())
+
+
+def test_chat_history_keeps_the_opening_and_the_recent_turns():
+    ai = ai_player(chat=True, max_history=8)
+    for turn in range(20):
+        ai.remember({"role": "user", "content": f"turn {turn}"}, "{}", chat_state())
+        assert len(ai.chat_history) <= 8
+    contents = [message["content"] for message in ai.chat_history if message["role"] == "user"]
+    assert contents[0] == "turn 0"
+    assert contents[-1] == "turn 19"
+
+
+def test_first_chat_message_is_counted_once_within_budget():
+    ai = ai_player(chat=True, max_prompt_tokens=40)
+    message = ai.create_chat_message(chat_state())
+    assert ai.decision_stats['prompt_tokens'] == count_tokens(message) <= 40
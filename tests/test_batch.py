@@ -0,0 +1,10 @@
+# test_batch.py
+import pytest
+
+pytest.importorskip("numpy")
+from batch import check_parity
+
+
+def test_batch_matches_engine():
+    # check_parity asserts the card math and the win rates itself
+    check_parity(trials=1000, games=1000)
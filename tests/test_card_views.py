@@ -0,0 +1,55 @@
+# test_card_views.py
+# The hand reuses its card widgets
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("PyQt5.QtMultimedia", exc_type=ImportError)  # ui.py plays sounds
+from PyQt5.QtWidgets import QApplication, QHBoxLayout, QWidget
+from card import REGISTRY
+from player import Player
+from ui import GameUI
+
+LASER, SHIELD, ROCKET = (REGISTRY.by_name(name) for name in ("Laser Attack", "Shield Upgrade", "Rocket Attack"))
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def hand_view(player):
+    # Only what GameUI.update_hand uses
+    container = QWidget()
+    ui = SimpleNamespace(player=player, card_views=[], pixmaps={}, font_family="Teko",
+                         cards_layout=QHBoxLayout(container), container=container,
+                         main_window=SimpleNamespace(deck=[]), update_deck_count=lambda count: None)
+    ui.create_card_view = lambda: GameUI.create_card_view(ui)
+    ui.card_pixmap = lambda path: GameUI.card_pixmap(ui, path)
+    return ui
+
+
+def shown(ui):
+    return [view.card for view in ui.card_views]
+
+
+def test_cards_keep_their_view_and_new_ones_take_freed_views(app):
+    player = Player("You")
+    player.hand += [LASER, SHIELD]
+    ui = hand_view(player)
+    GameUI.update_hand(ui)
+    views = list(ui.card_views)
+    assert shown(ui) == [player.skip_card, LASER, SHIELD]
+
+    player.hand.remove(SHIELD)
+    player.hand.append(ROCKET)
+    GameUI.update_hand(ui)
+    assert ui.card_views == views  # No widget was built again
+    assert shown(ui) == [player.skip_card, LASER, ROCKET]
+    assert views[2].name_label.text() == "Rocket Attack"
+
+    player.hand.remove(LASER)
+    GameUI.update_hand(ui)
+    assert shown(ui) == [player.skip_card, None, ROCKET]
+    assert views[1].widget.isHidden()
+    assert ui.card_buttons == [views[0].widget, views[2].widget]
+    assert len(ui.pixmaps) == 4  # One per image shown so far
@@ -0,0 +1,60 @@
+# test_cards.py
+import json
+import pytest
+import card
+from card import REGISTRY, SKIP_CARD, load_cards
+from player import Player
+
+SKIP = {"name": "Skip Turn", "effect": "skip", "copies": 0}
+
+
+def write_cards(tmp_path, cards):
+    path = tmp_path / "cards.json"
+    path.write_text(json.dumps({"cards": cards}), encoding="utf-8")
+    return str(path)
+
+
+def test_registry_matches_cards_json():
+    assert SKIP_CARD is REGISTRY[0]
+    assert len(REGISTRY.effects) == len(REGISTRY)
+    repair = REGISTRY.by_name("Repair")
+    assert REGISTRY.effects[repair.card_id] is repair.effect_fn
+    assert repair.effect_params == {"amount": 10, "cap": 100}
+
+
+def test_play_uses_the_effect_table():
+    player, opponent = Player("You"), Player("AI Opponent")
+    repair = REGISTRY.by_name("Repair")
+    player.health = 95
+    player.hand.append(repair)
+    player.play_card(repair, opponent)
+    assert player.health == 100  # Healed 10, capped at 100
+    assert player.resources == 10 - repair.cost
+
+
+@pytest.mark.parametrize("bad, message", [
+    ({"name": "Zap", "colour": "red"}, "unknown fields"),
+    ({"name": "Zap", "effect": "explode"}, "unknown effect"),
+    ({"name": "Zap", "effect": "heal", "params": {"radius": 3}}, "bad params"),
+    ({"name": "Zap", "attack": -5}, "non-negative integer"),
+    ({"name": "Skip Turn", "attack": 5}, "duplicate card"),
+    ({"name": "Wait", "effect": "skip"}, "exactly one card"),
+])
+def test_bad_cards_are_refused(tmp_path, bad, message):
+    with pytest.raises(ValueError, match=message):
+        load_cards(write_cards(tmp_path, [SKIP, bad]))
+
+
+def test_parsed_cards_are_cached_until_the_file_changes(tmp_path, monkeypatch):
+    path = write_cards(tmp_path, [{"name": "Zap", "attack": 5}, SKIP])
+    registry = load_cards(path)
+    assert [c.name for c in registry] == ["Skip Turn", "Zap"]  # Skip first, always id 0
+
+    def no_parsing(data, path):
+        raise AssertionError("parsed again")
+    monkeypatch.setattr(card, "_validate", no_parsing)
+    assert [c.attack for c in load_cards(path)] == [0, 5]
+
+    monkeypatch.undo()
+    path = write_cards(tmp_path, [SKIP, {"name": "Zap", "attack": 50, "description": "longer now"}])
+    assert [c.attack for c in load_cards(path)] == [0, 50]
@@ -0,0 +1,52 @@
+# test_decision_cache.py
+from decision_cache import DecisionCache, decision_key
+from card import REGISTRY
+
+
+def test_answers_survive_a_restart(tmp_path):
+    path = str(tmp_path / "decisions.sqlite")
+    cache = DecisionCache(path)
+    cache.put("k1", "Laser")
+    cache.close()
+    cache = DecisionCache(path)
+    assert cache.get("k1") == "Laser"
+    assert cache.get("k2") is None
+    assert (cache.disk_hits, cache.hits, cache.misses) == (1, 1, 1)
+    cache.close()
+
+
+def test_a_disk_hit_does_not_lock_the_file(tmp_path):
+    path = str(tmp_path / "decisions.sqlite")
+    first = DecisionCache(path)
+    first.put("k1", "Laser")
+    reader, writer = DecisionCache(path), DecisionCache(path)
+    assert reader.get("k1") == "Laser"
+    assert not reader.db.in_transaction
+    writer.db.execute("PRAGMA busy_timeout = 100")  # Fail fast instead of waiting 5 s
+    writer.put("k2", "Repair")
+    assert not writer.used and writer.get("k2") == "Repair"
+    assert DecisionCache(path).get("k2") == "Repair"
+    for cache in (first, reader, writer):
+        cache.close()
+
+
+def test_disk_keeps_the_recently_used(tmp_path):
+    path = str(tmp_path / "decisions.sqlite")
+    cache = DecisionCache(path, disk_capacity=2)
+    cache.put("old", "Laser")
+    cache.put("new", "Repair")
+    cache.close()
+    cache = DecisionCache(path, disk_capacity=2)
+    assert cache.get("old") == "Laser"  # Now the most recently used
+    cache.put("newest", "Laser")
+    rows = {key for key, in cache.db.execute("SELECT key FROM decisions")}
+    assert rows == {"old", "newest"}
+    cache.close()
+
+
+def test_key_buckets_numbers_and_ignores_card_order():
+    cards = list(REGISTRY)[:3]
+    key = decision_key(cards, 7, 55, 42, 31, "v1")
+    assert key == decision_key(cards[::-1], 6, 59, 49, 39, "v1")
+    assert key != decision_key(cards, 7, 55, 42, 31, "v2")
+    assert key != decision_key(cards, 7, 65, 42, 31, "v1")
@@ -0,0 +1,42 @@
+# test_endgame.py
+from math import comb
+import pytest
+from card import REGISTRY
+from deck import Deck
+from endgame import EndgameSolver, _draws, _outcomes
+from engine import GameEngine
+
+LASER, SHIELD, ROCKET, REPAIR = (REGISTRY.by_name(name) for name in
+                                 ("Laser Attack", "Shield Upgrade", "Rocket Attack", "Repair"))
+
+
+def test_deals_cover_every_outcome_once():
+    deck = Deck([LASER, LASER, SHIELD, ROCKET, REPAIR, REPAIR, REPAIR])
+    counts = deck.counts()
+    assert sum(ways for _, ways in _draws(counts, 3)) == comb(7, 3)
+    assert counts == deck.counts()  # Left as it was
+    assert sum(p for _, _, p in _outcomes(deck)) == pytest.approx(1.0)
+
+
+def endgame(ai_hand, player_health):
+    engine = GameEngine(deck=[SHIELD, REPAIR], seed=0)
+    engine.ai_player.hand.extend(ai_hand)
+    engine.player.health = player_health
+    engine.ai_player.health = 15  # Behind: running out of cards loses
+    engine.game.current_turn = engine.ai_player
+    engine._ai_moves_left = 1
+    return engine
+
+
+def test_solver_takes_the_winning_move():
+    engine = endgame([SHIELD, ROCKET], player_health=20)
+    card, value = EndgameSolver().best_move(engine)
+    assert card is ROCKET and value == 1.0
+    assert len(engine.deck) == 2 and engine.player.health == 20  # The real game is untouched
+
+
+def test_solver_only_plays_for_the_ai():
+    engine = endgame([LASER], player_health=20)
+    engine.game.current_turn = engine.player
+    with pytest.raises(ValueError):
+        EndgameSolver().best_move(engine)
@@ -0,0 +1,42 @@
+# test_heuristic.py
+from types import SimpleNamespace
+from card import REGISTRY
+from heuristic import damage, rank_moves, score_card
+from player import Player
+
+LASER, SHIELD, ROCKET, FULL_REPAIR, GENERATOR, SABOTAGE = (REGISTRY.by_name(name) for name in (
+    "Laser Attack", "Shield Upgrade", "Rocket Attack", "Full Repair", "Resource Generator", "Sabotage Attack"))
+
+
+def sides(health=100, resources=10, opponent_health=100, opponent_defense=0):
+    player = Player("AI Opponent")
+    player.health, player.resources = health, resources
+    opponent = SimpleNamespace(health=opponent_health, defense=opponent_defense, skip_next_turn=False)
+    return player, opponent
+
+
+def test_shields_absorb_all_but_piercing_damage():
+    assert damage(LASER, 10) == 5
+    assert damage(ROCKET, 30) == 0
+    assert damage(SABOTAGE, 30) == SABOTAGE.attack
+
+
+def test_a_kill_beats_everything():
+    player, opponent = sides(health=10, opponent_health=15)
+    assert rank_moves([FULL_REPAIR, SHIELD, LASER], player, opponent, 40)[0][1] is LASER
+
+
+def test_low_health_repairs():
+    player, opponent = sides(health=20, resources=12)
+    assert rank_moves([LASER, FULL_REPAIR, GENERATOR], player, opponent, 40)[0][1] is FULL_REPAIR
+
+
+def test_generator_early_only():
+    player, opponent = sides()
+    assert score_card(GENERATOR, player, opponent, 70) > score_card(GENERATOR, player, opponent, 20)
+
+
+def test_ranking_skips_unaffordable_and_repeated_cards():
+    player, opponent = sides(resources=3)
+    ranked = rank_moves([LASER, LASER, ROCKET, player.skip_card], player, opponent, 40)
+    assert [card for _, card in ranked] == [LASER, player.skip_card]
@@ -0,0 +1,100 @@
+# test_llm_client.py
+# The backend router against stub_server.py, run in-process on a free port
+import asyncio
+import time
+from contextlib import asynccontextmanager
+import pytest
+from aiohttp import web
+from llm_client import DECISION, NARRATIVE, Backend, LLMClient, StaleRequest
+from stub_server import StubServer
+
+PAYLOAD = {"model": "test", "prompt": "Hello", "stream": False}
+
+
+@asynccontextmanager
+async def serving(*stubs):
+    """Base URLs of the stubs, served while in the block"""
+    runners = []
+    try:
+        for stub in stubs:
+            runner = web.AppRunner(stub.app())
+            await runner.setup()
+            await web.TCPSite(runner, "127.0.0.1", 0).start()
+            runners.append(runner)
+        yield [f"http://127.0.0.1:{runner.addresses[0][1]}" for runner in runners]
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+
+def test_failing_server_is_left_alone():
+    async def run():
+        bad, good = StubServer("bad", delay=0.01, fail_rate=1.0), StubServer("good", delay=0.01)
+        async with serving(bad, good) as (bad_url, good_url):
+            broken = Backend(bad_url, max_failures=2, cooldown=60)
+            client = LLMClient([broken, Backend(good_url)])
+            answers = [await client.request("/api/generate", PAYLOAD, DECISION) for _ in range(10)]
+            await client.close()
+        assert bad.requests == 2
+        assert good.requests == 8
+        assert sum(answer is not None for answer in answers) == 8
+        assert not broken.available(time.monotonic())
+        assert client.metrics.failures["HTTP 503"] == 2
+
+    asyncio.run(run())
+
+
+def test_circuit_lets_one_request_try_again():
+    async def run():
+        bad, good = StubServer("bad", delay=0.01, fail_rate=1.0), StubServer("good", delay=0.01)
+        async with serving(bad, good) as (bad_url, good_url):
+            broken = Backend(bad_url, max_failures=1, cooldown=0.2)
+            client = LLMClient([broken, Backend(good_url)])
+            for _ in range(4):
+                await client.request("/api/generate", PAYLOAD, DECISION)
+            assert bad.requests == 1
+            await asyncio.sleep(0.25)
+            assert broken.available(time.monotonic())
+            for _ in range(4):
+                await client.request("/api/generate", PAYLOAD, DECISION)
+            await client.close()
+        # One try after the cooldown, which fails and opens the circuit again
+        assert bad.requests == 2
+        assert not broken.available(time.monotonic())
+
+    asyncio.run(run())
+
+
+def test_dropped_and_late_requests_are_counted_apart():
+    async def run():
+        async with serving(StubServer("slow", delay=0.5)) as (url,):
+            client = LLMClient(url)
+            narrative = asyncio.ensure_future(client.request("/api/generate", PAYLOAD, NARRATIVE))
+            await asyncio.sleep(0.05)
+            client.drop(NARRATIVE)
+            with pytest.raises(StaleRequest):
+                await narrative
+            with pytest.raises(asyncio.TimeoutError):
+                await client.request("/api/generate", PAYLOAD, DECISION, deadline=time.monotonic() + 0.1)
+            await client.close()
+        assert client.metrics.dropped == 1
+        assert client.metrics.failures["missed deadline"] == 1
+
+    asyncio.run(run())
+
+
+def test_half_open_circuit_sends_one_trial_request():
+    async def run():
+        bad, good = StubServer("bad", delay=0.2, fail_rate=1.0), StubServer("good", delay=0.01)
+        async with serving(bad, good) as (bad_url, good_url):
+            broken = Backend(bad_url, max_failures=1, cooldown=0.1)
+            client = LLMClient([broken, Backend(good_url)])
+            await client.request("/api/generate", PAYLOAD, DECISION)
+            await asyncio.sleep(0.15)
+            # Sent together: only one of them may go to the server that failed
+            await asyncio.gather(*(client.request("/api/generate", PAYLOAD, NARRATIVE) for _ in range(6)))
+            await client.close()
+        assert bad.requests == 2
+        assert good.requests == 5
+
+    asyncio.run(run())
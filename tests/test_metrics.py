@@ -0,0 +1,42 @@
+# test_metrics.py
+import json
+import random
+import pytest
+from metrics import Histogram, Metrics
+
+
+def test_quantiles_within_a_bucket():
+    rng = random.Random(0)
+    values = sorted(rng.lognormvariate(0, 1) for _ in range(10000))
+    histogram = Histogram()
+    for value in values:
+        histogram.add(value)
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * len(values)) - 1]
+        assert histogram.quantile(q) == pytest.approx(exact, rel=0.06)
+    assert histogram.quantile(1.0) == values[-1]
+    assert Histogram().quantile(0.5) == 0.0
+
+
+def test_single_value_is_its_own_quantile():
+    histogram = Histogram()
+    histogram.add(0.25)
+    assert histogram.summary() == {"count": 1, "mean": 0.25, "min": 0.25, "max": 0.25,
+                                   "p50": 0.25, "p95": 0.25, "p99": 0.25}
+
+
+def test_requests_and_decisions_add_up(tmp_path):
+    metrics = Metrics(max_turns=2)
+    ollama = {"eval_count": 20, "eval_duration": 500_000_000, "prompt_eval_count": 100}
+    metrics.request("decision", 1, 0.6, data=ollama)
+    metrics.request("narrative", 1, 1.0, error="dropped")
+    metrics.request("narrative", 2, 0.2, error="cancelled")
+    metrics.request("decision", 3, 2.0, error="missed deadline")
+    metrics.decision("model", 0.7, 3, retries=1, error="Response format error")
+    assert (metrics.dropped, metrics.cancelled, dict(metrics.failures)) == (1, 1, {"missed deadline": 1})
+    assert metrics.tokens_per_second.quantile(0.5) == pytest.approx(40, rel=0.06)
+    assert list(metrics.turns) == [2, 3]  # Only the last max_turns
+    assert metrics.turns[3]["decision"] == 0.7
+    with open(metrics.dump(str(tmp_path / "metrics.json")), encoding="utf-8") as f:
+        assert json.load(f)["sources"] == {"model": 1}
+    assert metrics.lines()[0].startswith("requests 4, failed 1, dropped 1, cancelled 1")
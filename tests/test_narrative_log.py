@@ -0,0 +1,40 @@
+# test_narrative_log.py
+# Streamed narratives fill in their own paragraph of the battle log
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("PyQt5.QtMultimedia", exc_type=ImportError)  # ui.py plays sounds
+from PyQt5.QtWidgets import QApplication, QTextEdit
+from ui import GameUI
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def narrative_log():
+    # Only what the narrative methods of GameUI use
+    return SimpleNamespace(narrative_text=QTextEdit(), narrative_blocks=[], pending_narratives={},
+                           narrative_timer=SimpleNamespace(isActive=lambda: True))
+
+
+def paragraphs(log):
+    document = log.narrative_text.document()
+    return [document.findBlockByNumber(i).text() for i in range(document.blockCount())]
+
+
+def test_streamed_narratives_keep_their_paragraph(app):
+    log = narrative_log()
+    GameUI.update_narrative(log, "Welcome, General!")
+    first = GameUI.begin_narrative(log, "▶ You used Laser")
+    second = GameUI.begin_narrative(log)
+    GameUI.update_narrative(log, "▶ AI used Repair")
+    GameUI.set_narrative(log, second, "● Boom\nbang")
+    GameUI.set_narrative(log, first, "● Zap")
+    GameUI.flush_narratives(log)
+    assert paragraphs(log) == ["Welcome, General!", "● Zap", "● Boom\u2028bang", "▶ AI used Repair"]
+    # Later chunks replace the paragraph, the others stay put
+    GameUI.set_narrative(log, first, "● Zap, zap")
+    GameUI.flush_narratives(log)
+    assert paragraphs(log) == ["Welcome, General!", "● Zap, zap", "● Boom\u2028bang", "▶ AI used Repair"]
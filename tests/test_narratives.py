@@ -0,0 +1,64 @@
+# test_narratives.py
+import asyncio
+import contextlib
+from types import SimpleNamespace
+from narratives import NarrativePool, usable
+
+
+def test_blank_and_fallback_narratives_are_not_kept():
+    assert not usable("● ")
+    assert not usable("▶ ")
+    assert not usable("")
+    assert not usable("▶ The battle continues...")
+    assert usable("● The hull buckles.")
+
+
+class FakeNarrator:
+    """Answers narrative requests at once, counts them; `busy` stands for a decision in flight"""
+
+    def __init__(self, answers):
+        self.answers = iter(answers)
+        self.asked = 0
+        self.busy = False
+        self.client = SimpleNamespace(busy=lambda priority: self.busy)
+
+    async def generate_narrative(self, action, on_text=None, priority=None):
+        self.asked += 1
+        return next(self.answers, "▶ The battle continues...")
+
+
+async def run_refill(pool, narrator, seconds=0.05):
+    task = asyncio.ensure_future(pool.refill(narrator, pause=0.001, rotate_every=0.001))
+    await asyncio.sleep(seconds)
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+
+
+def test_refill_waits_while_a_decision_is_asked(tmp_path):
+    async def run():
+        pool = NarrativePool(str(tmp_path / "narratives.json"))
+        narrator = FakeNarrator([f"● Text {i}" for i in range(1000)])
+        narrator.busy = True
+        await run_refill(pool, narrator)
+        assert narrator.asked == 0
+        narrator.busy = False
+        await run_refill(pool, narrator)
+        assert narrator.asked > 0 and not pool.missing()
+
+    asyncio.run(run())
+
+
+def test_refill_keeps_only_new_usable_text(tmp_path):
+    async def run():
+        pool = NarrativePool(str(tmp_path / "narratives.json"))
+        narrator = FakeNarrator(["● ", "● Same", "● Same", "▶ The battle continues..."])
+        await run_refill(pool, narrator)
+        # The repeat goes to the next empty slot, the blank and the fallback nowhere
+        assert sorted(pool.pool.values()) == [["● Same"], ["● Same"]]
+        actor, card_name = next(iter(pool.pool)).split("|")
+        assert not pool.add(actor, card_name, "● Same")
+        # Saved for the next game
+        assert NarrativePool(pool.path).pool == pool.pool
+
+    asyncio.run(run())
@@ -0,0 +1,55 @@
+# test_policy.py
+import random
+import pytest
+
+pytest.importorskip("numpy")
+from card import REGISTRY
+from policy import Policy, agreement, split, train
+
+LASER, ROCKET, REPAIR = (REGISTRY.by_name(name) for name in ("Laser Attack", "Rocket Attack", "Repair"))
+
+
+def logged_decisions(n, seed=0):
+    """Rows like decision_cache.DecisionLog writes: repair when low, else the rocket if offered, else the laser"""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        health = rng.randint(1, 100)
+        options = sorted(rng.sample([LASER.card_id, ROCKET.card_id, REPAIR.card_id], 2))
+        if health < 40 and REPAIR.card_id in options:
+            choice = REPAIR.card_id
+        else:
+            choice = ROCKET.card_id if ROCKET.card_id in options else LASER.card_id
+        rows.append({"s": [health, rng.randint(0, 20), rng.randint(1, 100), 0, rng.randint(0, 80)],
+                     "o": options, "c": choice, "v": "test"})
+    return rows
+
+
+def test_policy_learns_the_model_choices():
+    train_rows, test_rows = split(logged_decisions(1500))
+    assert len(test_rows) == 300
+    report = agreement(train(train_rows, hidden=16), test_rows, train_rows)
+    assert report["agreement"] > 0.9
+    assert report["agreement"] > report["baseline"]
+    coverage, agreed = report["by_confidence"][0.9]
+    assert agreed >= report["agreement"]
+
+
+def test_saved_policy_chooses_like_the_trained_one(tmp_path):
+    policy = train(logged_decisions(500), hidden=0)
+    path = str(tmp_path / "policy.npz")
+    policy.save(path)
+    loaded = Policy.load(path)
+    state = {'ai_health': 20, 'ai_resources': 10, 'player_health': 70, 'player_defense': 0, 'deck': [LASER] * 30}
+    card, confidence = loaded.choose(state, [LASER, REPAIR])
+    assert (card, confidence) == policy.choose(state, [LASER, REPAIR])
+    assert card is REPAIR and 0.5 < confidence <= 1.0
+
+
+def test_policy_for_other_cards_is_not_loaded(tmp_path):
+    policy = train(logged_decisions(50), hidden=0, epochs=5)
+    policy.names[1] = "Old Card"
+    path = str(tmp_path / "policy.npz")
+    policy.save(path)
+    assert Policy.load(path) is None
+    assert Policy.load(str(tmp_path / "missing.npz")) is None
@@ -0,0 +1,58 @@
+# test_prefetch.py
+import asyncio
+from ai_player import AIPlayer
+from decision_cache import DecisionCache, DecisionLog
+from engine import GameEngine
+from prefetch import MovePrefetcher
+
+
+def rules_game(seed=0):
+    # A rules-only AI, so every reply is instant and needs no server
+    ai = AIPlayer("AI Opponent", "http://127.0.0.1:9", llm_tiebreak=False,
+                  decisions=DecisionCache(None), decision_log=DecisionLog(None))
+    engine = GameEngine(ai_player=ai, seed=seed)
+    engine.start()
+    return engine
+
+
+def no_stun(engine):
+    return next(card for card in engine.legal_moves() if card.effect != "skip_turn")
+
+
+def test_reply_for_the_same_position_is_used_and_counted_once():
+    async def run():
+        engine = rules_game()
+        sources = engine.ai_player.client.metrics.sources  # The client, and so this, is shared
+        before = sources["rules"]
+        prefetcher = MovePrefetcher()
+        prefetcher.start(engine)
+        await asyncio.sleep(0.05)  # Every reply is worked out by now
+        card = no_stun(engine)
+        prefetcher.choose(card)
+        engine.play(card)
+        move = await prefetcher.reply(engine)
+        assert move is not None and move in engine.legal_moves(engine.ai_player)
+        assert (prefetcher.hits, prefetcher.misses) == (1, 0)
+        # The replies to the other cards were never reported
+        assert sources["rules"] == before + 1
+        assert engine.ai_player.held is None
+
+    asyncio.run(run())
+
+
+def test_reply_for_another_position_is_thrown_away():
+    async def run():
+        engine = rules_game()
+        sources = engine.ai_player.client.metrics.sources
+        before = sum(sources.values())
+        prefetcher = MovePrefetcher()
+        prefetcher.start(engine)
+        card = no_stun(engine)
+        prefetcher.choose(card)
+        engine.ai_player.health -= 5  # Not what the copy saw
+        engine.play(card)
+        assert await prefetcher.reply(engine) is None
+        assert (prefetcher.hits, prefetcher.misses) == (0, 1)
+        assert sum(sources.values()) == before
+
+    asyncio.run(run())
@@ -0,0 +1,28 @@
+# test_prompt.py
+from card import REGISTRY
+from prompt import card_line, count_tokens, encode_prompt
+
+LASER, SHIELD = REGISTRY.by_name("Laser Attack"), REGISTRY.by_name("Shield Upgrade")
+STATE = {'ai_health': 80, 'ai_resources': 7, 'player_health': 60, 'player_defense': 10, 'deck': [LASER] * 30}
+
+
+def test_prompt_has_the_state_legend_and_options():
+    prompt, tokens = encode_prompt(STATE, [SHIELD, LASER, LASER])
+    assert prompt.splitlines()[:4] == ["you hp80 res7 | foe hp60 def10 | deck30",
+                                       "C1 Laser Attack: atk15 cost2", "C2 Shield Upgrade: def10 cost2",
+                                       "options: C1, C2"]
+    assert tokens == count_tokens(prompt)
+
+
+def test_over_budget_the_legend_goes_first():
+    error = "Card X is not one of the options"
+    full, full_tokens = encode_prompt(STATE, [SHIELD, LASER], error)
+    prompt, tokens = encode_prompt(STATE, [SHIELD, LASER], error, max_tokens=full_tokens - 1)
+    assert tokens < full_tokens
+    assert "atk15" not in prompt
+    assert "C1=Laser Attack, C2=Shield Upgrade" in prompt
+    assert prompt.startswith("you hp80") and "options: C1, C2" in prompt and "last answer rejected" in prompt
+
+
+def test_skip_card_goes_by_its_answer_name():
+    assert card_line(0).startswith("C0 skip_turn:")
@@ -0,0 +1,41 @@
+# test_zobrist.py
+import random
+from engine import GameEngine
+from zobrist import TranspositionTable, deck_key, hand_key
+
+
+def test_incremental_keys_match_a_fresh_hash():
+    engine = GameEngine(seed=3)
+    engine.start()
+    rng = random.Random(3)
+    while engine.to_move is not None:
+        actor = engine.to_move
+        engine.play(rng.choice(engine.legal_moves(actor)))
+        for player in (engine.player, engine.ai_player):
+            assert player.zobrist == hand_key(player.hand)
+        assert engine.deck.zobrist == deck_key(engine.deck.ids)
+
+
+def test_key_depends_on_the_position_only():
+    engine = GameEngine(seed=1)
+    engine.start()
+    copy = engine.clone(seed=99)
+    assert copy.state_key() == engine.state_key()
+    copy.player.hand.reverse()  # A hand is a multiset, order doesn't matter
+    assert copy.state_key() == engine.state_key()
+    copy.player.health -= 1
+    assert copy.state_key() != engine.state_key()
+    copy.player.health += 1
+    copy.game.current_turn = copy.ai_player
+    assert copy.state_key() != engine.state_key()
+
+
+def test_table_drops_the_least_recently_used():
+    table = TranspositionTable(capacity=2)
+    table.put(1, "a")
+    table.put(2, "b")
+    assert table.get(1) == "a"  # 2 is now the oldest
+    table.put(3, "c")
+    assert 2 not in table and 1 in table and 3 in table
+    assert table.get(2) is None
+    assert (table.hits, table.misses, len(table)) == (1, 1, 2)
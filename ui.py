@@ -1,10 +1,40 @@
 import random
 from PyQt5.QtWidgets import (QVBoxLayout, QLabel, QPushButton, QWidget, 
-                           QHBoxLayout, QGroupBox, QFrame, QProgressBar, QStackedLayout, QTextEdit)
-from PyQt5.QtGui import QPalette, QBrush, QPixmap, QPainter, QColor, QPainterPath, QTextOption, QFontDatabase
+                           QHBoxLayout, QGroupBox, QFrame, QProgressBar, QStackedLayout, QTextEdit, QShortcut)
+from PyQt5.QtGui import (QPalette, QBrush, QPixmap, QPainter, QColor, QPainterPath, QTextOption, QFontDatabase,
+                         QTextCursor, QKeySequence)
 from PyQt5.QtCore import Qt, QSize, QRectF, QTimer
 from PyQt5.QtMultimedia import QSound
 
+def one_paragraph(text):
+    # Line breaks as line separators, so a narrative stays one block of the log
+    return text.replace("\r\n", "\n").replace("\n", "\u2028")
+
+
+class CardView:
+    """The widgets of one hand slot, rebound to whatever card is in it"""
+
+    def __init__(self, widget, image_label, cost_label, name_label, description_label):
+        self.widget = widget
+        self.image_label = image_label
+        self.cost_label = cost_label
+        self.name_label = name_label
+        self.description_label = description_label
+        self.card = None
+
+    def bind(self, card, pixmap=None):
+        if card is self.card:
+            return
+        self.card = card
+        if card is None:
+            self.widget.hide()
+            return
+        self.image_label.setPixmap(pixmap)
+        self.cost_label.setText(f"⬣ {card.cost}")
+        self.name_label.setText(card.name)
+        self.description_label.setText(card.description)
+
+
 class GameUI:
     def __init__(self, main_window, player, ai_player, narrative_ai):
         # Load custom font
@@ -35,6 +65,14 @@ class GameUI:
         """)
         self.narrative_text.setWordWrapMode(QTextOption.WordWrap)
 
+        # Streamed narratives: latest text per paragraph, written out at most every 50 ms
+        self.narrative_blocks = []  # Handle -> QTextBlock, which stays valid while others change
+        self.pending_narratives = {}
+        self.narrative_timer = QTimer()
+        self.narrative_timer.setSingleShot(True)
+        self.narrative_timer.setInterval(50)
+        self.narrative_timer.timeout.connect(self.flush_narratives)
+
         # Create main container with padding
         main_container = QWidget()
         main_container.setStyleSheet("padding: 20px;")
@@ -73,6 +111,26 @@ class GameUI:
         self.update_resource_display()  # Move this call here
         self.update_defense_display()  # Move call here, after both labels exist
 
+        # Model telemetry (metrics.py): F3 shows it over the game, F4 saves it as JSON
+        self.metrics = narrative_ai.client.metrics
+        self.debug_overlay = QLabel(self.main_window)
+        self.debug_overlay.setStyleSheet("""
+            QLabel {
+                color: #00ff00;
+                font-family: monospace;
+                font-size: 11px;
+                background-color: rgba(0, 0, 0, 200);
+                padding: 6px;
+            }
+        """)
+        self.debug_overlay.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.debug_overlay.hide()
+        self.debug_timer = QTimer()
+        self.debug_timer.setInterval(500)
+        self.debug_timer.timeout.connect(self.update_debug_overlay)
+        QShortcut(QKeySequence("F3"), self.main_window, self.toggle_debug_overlay)
+        QShortcut(QKeySequence("F4"), self.main_window, self.dump_metrics)
+
     def create_intro_layout(self):
         intro_widget = QWidget()
         layout = QVBoxLayout()
@@ -440,7 +498,8 @@ class GameUI:
         
         # Initialize card buttons list before creating containers
         self.card_buttons = []
-        
+        self.card_views = []  # Pool of CardView, one per hand slot ever needed
+        self.pixmaps = {}  # Card image path -> QPixmap
         # Create cards container with explicit size policy
         self.cards_container = QWidget()
         self.cards_layout = QHBoxLayout(self.cards_container)
@@ -565,25 +624,40 @@ class GameUI:
         """))
 
     def update_hand(self):
-        # Clear existing buttons and layout
-        self.card_buttons = []
-        
-        # Clear previous layout
-        while self.cards_layout.count():
-            child = self.cards_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
-        
-        # Add new card buttons
-        for card in self.player.hand:
-            card_widget = self.create_card_widget(card)
-            self.card_buttons.append(card_widget)
-            self.cards_layout.addWidget(card_widget)
+        """Show the player's hand on the pooled card views, only touching slots whose card changed.
+
+        A view keeps its card while that card is still in the hand, so cards
+        don't move around; the new cards go to the views that were freed.
+        """
+        remaining = list(self.player.hand)
+        free = []
+        for view in self.card_views:
+            if view.card is not None and view.card in remaining:
+                remaining.remove(view.card)
+            else:
+                free.append(view)
+        for card in remaining:
+            view = free.pop(0) if free else self.create_card_view()
+            view.bind(card, self.card_pixmap(card.image_path))
+        for view in free:
+            view.bind(None)
+
+        self.card_buttons = [view.widget for view in self.card_views if view.card is not None]
+        for widget in self.card_buttons:
+            if widget.isHidden():
+                widget.show()
 
         # Update deck count
         self.update_deck_count(len(self.main_window.deck))  # Add this line
 
-    def create_card_widget(self, card):
+    def card_pixmap(self, path):
+        # Decoded once per image, the hand reuses a handful of them
+        pixmap = self.pixmaps.get(path)
+        if pixmap is None:
+            pixmap = self.pixmaps[path] = QPixmap(path)
+        return pixmap
+
+    def create_card_view(self):
         # Create container widget for the card
         card_widget = QWidget()
         card_widget.setFixedSize(150, 200)
@@ -615,12 +689,10 @@ class GameUI:
 
         # Image label
         image_label = QLabel()
-        pixmap = QPixmap(card.image_path)
-        image_label.setPixmap(pixmap)
         image_label.setAlignment(Qt.AlignCenter)
 
         # Cost icon label
-        cost_label = QLabel(f"⬣ {card.cost}")
+        cost_label = QLabel()
         cost_label.setStyleSheet(f"""
             QLabel {{
                 font-size: 16px;
@@ -642,11 +714,7 @@ class GameUI:
         card_layout.addWidget(image_container)
 
         # Name label
-        name_label = QLabel(card.name)
-        name_label.setAlignment(Qt.AlignCenter)
-
-        # Name label
-        name_label = QLabel(card.name)
+        name_label = QLabel()
         name_label.setAlignment(Qt.AlignCenter)
         name_label.setStyleSheet(f"""
             QLabel {{
@@ -660,7 +728,7 @@ class GameUI:
         """)
 
         # Description label
-        description_label = QLabel(card.description)
+        description_label = QLabel()
         description_label.setAlignment(Qt.AlignCenter)
         description_label.setWordWrap(True)
         description_label.setStyleSheet(f"""
@@ -678,10 +746,14 @@ class GameUI:
         card_layout.addWidget(name_label)
         card_layout.addWidget(description_label)
 
-        # Make the whole card clickable
-        card_widget.mousePressEvent = lambda e, c=card: self.main_window.play_card(c)
+        view = CardView(card_widget, image_label, cost_label, name_label, description_label)
 
-        return card_widget
+        # Make the whole card clickable, it plays whatever card the view shows now
+        card_widget.mousePressEvent = lambda e: view.card is not None and self.main_window.play_card(view.card)
+
+        self.card_views.append(view)
+        self.cards_layout.addWidget(card_widget)
+        return view
 
     def update_stats(self):
         # Update health bars
@@ -692,14 +764,14 @@ class GameUI:
         self.update_defense_display()  # Add this line
         self.ai_defense_label.setText(f"🛡️ {self.ai_player.defense}")
 
-    def show_waiting_message(self):
+    def show_waiting_message(self, status="AI is thinking..."):
         self.waiting_label.setVisible(True)
-        self.status_label.setText("AI is thinking...")
+        self.status_label.setText(status)
         for btn in self.card_buttons:
             btn.setVisible(False)
 
-    def show_cards(self, visible=True):
-        self.status_label.setText("Your turn!")
+    def show_cards(self, visible=True, status="Your turn!"):
+        self.status_label.setText(status)
         for btn in self.card_buttons:
             btn.setVisible(visible)
         self.cards_container.setVisible(visible)
@@ -719,6 +791,49 @@ class GameUI:
         # Append new narrative to the text box
         self.narrative_text.append(text)
 
+    def begin_narrative(self, text=""):
+        """Append a paragraph that will be filled in later, returns its handle for set_narrative"""
+        # Never empty: append() on an empty box reuses its block, the next paragraph would land in it
+        self.narrative_text.append(one_paragraph(text) or "…")
+        self.narrative_blocks.append(self.narrative_text.document().lastBlock())
+        return len(self.narrative_blocks) - 1
+
+    def set_narrative(self, block, text):
+        # Many chunks per frame are common, only the last one gets drawn
+        self.pending_narratives[block] = text
+        if not self.narrative_timer.isActive():
+            self.narrative_timer.start()
+
+    def flush_narratives(self):
+        for handle, text in self.pending_narratives.items():
+            cursor = QTextCursor(self.narrative_blocks[handle])
+            cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+            cursor.insertText(one_paragraph(text))
+        self.pending_narratives.clear()
+        scrollbar = self.narrative_text.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
+
+    def toggle_debug_overlay(self):
+        if self.debug_overlay.isVisible():
+            self.debug_timer.stop()
+            self.debug_overlay.hide()
+        else:
+            self.update_debug_overlay()
+            self.debug_overlay.show()
+            self.debug_overlay.raise_()
+            self.debug_timer.start()
+
+    def update_debug_overlay(self):
+        self.debug_overlay.setText("\n".join(self.metrics.lines()))
+        self.debug_overlay.adjustSize()
+        self.debug_overlay.move(10, 10)
+
+    def dump_metrics(self):
+        try:
+            print(f"Metrics saved to {self.metrics.dump()}")
+        except OSError as e:
+            print(f"Could not save metrics: {e}")
+
     def start_game(self):
         self.show_layout('game')
         # Introduction is now handled asynchronously
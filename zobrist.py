@@ -0,0 +1,80 @@
+# zobrist.py
+import hashlib
+from collections import OrderedDict
+from functools import lru_cache
+
+MASK = (1 << 64) - 1
+_MIX = 0x9E3779B97F4A7C15  # Odd multiplier, tells the two seats apart
+
+
+@lru_cache(maxsize=None)
+def feature_key(*feature):
+    """Random-looking 64-bit key for one (feature, value) pair.
+
+    Derived from a hash instead of a seeded RNG so keys are the same in every
+    process and every run, which persistent caches rely on.
+    """
+    digest = hashlib.blake2b(repr(feature).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+# Hands and decks are multisets, so their keys are added (mod 2**64) per card
+# instead of XORed: two copies of a card must not cancel out.
+HAND_KEYS = [feature_key("hand", card_id) for card_id in range(256)]
+DECK_KEYS = [feature_key("deck", card_id) for card_id in range(256)]
+
+
+def hand_key(cards):
+    return sum(HAND_KEYS[card.card_id] for card in cards) & MASK
+
+
+def deck_key(card_ids):
+    return sum(DECK_KEYS[card_id] for card_id in card_ids) & MASK
+
+
+def player_key(player):
+    """Hand (kept up to date by Player) plus the scalar stats"""
+    return (player.zobrist
+            ^ feature_key("health", player.health)
+            ^ feature_key("defense", player.defense)
+            ^ feature_key("resources", player.resources)
+            ^ feature_key("stunned", player.skip_next_turn))
+
+
+def game_key(engine):
+    seat = 0 if engine.to_move is engine.player else 1
+    return (player_key(engine.player)
+            ^ (player_key(engine.ai_player) * _MIX & MASK)
+            ^ engine.deck.zobrist
+            ^ feature_key("to_move", seat, engine._ai_moves_left, engine.winner, engine.pending_deal))
+
+
+class TranspositionTable:
+    """Bounded map from position key to a search result, least recently used out first"""
+
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries